@@ -22,6 +22,7 @@ class CMDCode(Enum):
     INIT_STATE = auto()
     DEINIT_STATE = auto()
     SEND_MESSAGES = auto()
+    HEALTH = auto()
 
 
 class LauncherCommand:
@@ -43,7 +44,8 @@ class LauncherCommand:
         CMDCode.COMPLETE: ['complete', 'ok'],
         CMDCode.INIT_STATE: ['start', 'st', 'init'],
         CMDCode.DEINIT_STATE: ['stop', 'terminate', 'term', 'deinit'],
-        CMDCode.SEND_MESSAGES: ['send', 'M', 'message']
+        CMDCode.SEND_MESSAGES: ['send', 'M', 'message'],
+        CMDCode.HEALTH: ['health', 'hp']
     }
     user_accounts: Dict[str, str] = {}
 
@@ -61,12 +63,21 @@ class LauncherCommand:
 
     @classmethod
     def execute_command(cls):
+        '''Send the command without waiting for it, the console stays
+        responsive and failures are reported once they are known.'''
+
         try:
-            cls.command.execute()
+            return cls.command.execute(callback=cls._report)
         
         except Exception as e:
             print(Command.ERR_S, e, sep=' ')
 
+    @staticmethod
+    def _report(result: CommandResult) -> None:
+        if not result.ok:
+            print(Command.ERR_S, f'{result.command} has failed',
+                  f'(status: {result.status}, error: {result.error!r})', sep=' ')
+
     @classmethod
     def find_match(cls):
         cls.set_command(MatchFinder())
@@ -148,6 +159,11 @@ class LauncherCommand:
         cls.set_command(DeinitState())
         cls.execute_command()
 
+    @classmethod
+    def health(cls):
+        cls.set_command(HealthGetter())
+        cls.execute_command()
+
     @classmethod
     def default_action(cls):
         print(Command.INFO_S,
@@ -221,6 +237,9 @@ class LauncherCommand:
                 except IndexError:
                     print(Command.ERR_S, 'provide an argument')
 
+            elif _cmd in self.CMD[CMDCode.HEALTH]:
+                LauncherCommand.health()
+
             else:
                 LauncherCommand.default_action()
 
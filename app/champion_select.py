@@ -16,7 +16,6 @@ Attributes:
 """
 
 import os
-import json
 from enum import Enum, auto
 from typing import List, Union, Tuple
 
@@ -33,6 +32,7 @@ from kivy.uix.label import Label
 
 import champion_select_utils
 from packages.utils import path_problem_solver
+from packages import json_codec
 
 
 # defines type hints and constants
@@ -51,10 +51,10 @@ images = [
 
 CHAMPION_SELECT_SETTINGS_PATH = path_problem_solver("data") + "\\" + "champion_select_picks_and_bans.json"
 # loads saved data about in app champion select
-with open(CHAMPION_SELECT_SETTINGS_PATH, "r") as settings_file:
+with open(CHAMPION_SELECT_SETTINGS_PATH, "rb") as settings_file:
     try:
-        settings = json.load(settings_file)
-    except json.JSONDecodeError:
+        settings = json_codec.load(settings_file)
+    except json_codec.JSONDecodeError:
         settings = {"picks": None, "bans": None}
     finally:
         LOADED_PICKS, LOADED_BANS = settings.values()
@@ -525,10 +525,8 @@ class ChampionSelectUI(BoxLayout):
 
         return self.pick_handler.export_array_champions()
 
-    def _restrict_champion_pool(self) -> None:
+    def _restrict_champion_pool(self, champion_pool: List[str]) -> None:
         """Restricts the ChampionSelect champion pool to champions owned by the user."""
-        champion_pool = champion_select_utils.get_available_champions()
-
         if champion_pool is None:
             # in case of no connection with LCU
             return
@@ -552,12 +550,16 @@ class ChampionSelectUI(BoxLayout):
         """
 
         if not self.settings_already_loaded:
-            self._restrict_champion_pool()
             self.load_bans(LOADED_BANS)
-            self.load_picks(LOADED_PICKS)
+            # picks are checked against the champion pool, they are loaded once it is received from the LCU
+            champion_select_utils.get_available_champions(self._load_champion_pool)
 
             self.settings_already_loaded = True
 
+    def _load_champion_pool(self, champion_pool: List[str]) -> None:
+        self._restrict_champion_pool(champion_pool)
+        self.load_picks(LOADED_PICKS)
+
     def _save_current_settings(self) -> None:
         """Macro for saving current champion select settings. Meant to be called in the main .kv file."""
 
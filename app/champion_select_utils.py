@@ -1,96 +1,94 @@
 # -*- coding: utf-8 -*-
 """This module contains useful functions that allow to easily download champions, summoner spell and rune page
 data from the LCU.
+
+The functions don't wait for the LCU, they are called from the UI. The data is passed to the given callback once it
+has arrived, on the Kivy thread.
 """
 
-import json
-from typing import List, Tuple
+from typing import Any, Callable, List, Tuple
+from kivy.clock import Clock
 from packages.utils import path_problem_solver
-from command import EndpointSaver
+from packages import json_codec
+from packages.logger import get_logger
+from command import CommandResult, EndpointSaver
+
+logger = get_logger('champion_select_utils')
 
 saved_to_json = None
 
 
-def get_summoner_id(output_filename="users_summoner_id") -> str:
-    """Function returns the user's summoner id."""
+def _load_endpoint(reqs: str, output_filename: str, callback: Callable[[Any], None]) -> None:
+    """Saves the LCU's response of the endpoint to the JSON file without waiting for it. Once the request has
+    finished, the file is loaded and passed to the callback on the Kivy thread. If the request fails, the previously
+    saved file is loaded.
+    """
+
+    def on_saved(result: CommandResult) -> None:
+        if not result.ok:
+            logger.warning("%s couldn't be requested (status: %s), loading the last saved response.",
+                           reqs, result.status)
 
-    command = EndpointSaver(
-        reqs="/lol-summoner/v1/current-summoner", filename=output_filename
-    )
-    command.execute()
+        with open(
+            path_problem_solver("JSONfiles") + "\\" + output_filename + ".json", "rb"
+        ) as file:
+            callback(json_codec.load(file))
 
-    with open(
-        path_problem_solver("JSONfiles") + "\\" + output_filename + ".json", "r"
-    ) as file:
-        summoner_data = json.load(file)
+    # the result comes on the connector's loop, the UI is updated on its own thread
+    EndpointSaver(reqs=reqs, filename=output_filename).execute(
+        callback=lambda result: Clock.schedule_once(lambda dt: on_saved(result)))
 
-    return summoner_data["summonerId"]
 
+def get_summoner_id(callback: Callable[[str], None], output_filename="users_summoner_id") -> None:
+    """Function passes the user's summoner id to the callback."""
 
-def get_available_champions(output_filename="users_champions") -> List[str]:
-    """Function gets the user's available champions' names through the LCU and returns them as a list of strings."""
+    _load_endpoint("/lol-summoner/v1/current-summoner", output_filename,
+                   lambda summoner_data: callback(summoner_data["summonerId"]))
 
-    command = EndpointSaver(
-        reqs="/lol-champions/v1/owned-champions-minimal", filename=output_filename
-    )
-    command.execute()
 
-    with open(
-        path_problem_solver("JSONfiles") + "\\" + output_filename + ".json", "r"
-    ) as file:
-        summoner_champions = json.load(file)
+def get_available_champions(callback: Callable[[List[str]], None], output_filename="users_champions") -> None:
+    """Function gets the user's available champions' names through the LCU and passes them to the callback as a list
+    of strings.
+    """
 
-    return [champ_data["alias"].lower() for champ_data in summoner_champions]
+    _load_endpoint("/lol-champions/v1/owned-champions-minimal", output_filename,
+                   lambda summoner_champions: callback([champ_data["alias"].lower()
+                                                        for champ_data in summoner_champions]))
 
 
-def get_available_summoner_spells(output_filename="users_summoner_spells") -> List[str]:
-    """Function returns summoner spells owned by the user in case his account is under level 9 at which all summoner
-    spells are available. It might be more more optimal to check the account's level beforehand.
+def get_available_summoner_spells(callback: Callable[[List[str]], None],
+                                  output_filename="users_summoner_spells") -> None:
+    """Function passes summoner spells owned by the user to the callback in case his account is under level 9 at which
+    all summoner spells are available. It might be more more optimal to check the account's level beforehand.
 
     """
 
-    summoner_id = get_summoner_id()
-    command = EndpointSaver(
-        reqs=f"/lol-collections/v1/inventories/{summoner_id}/spells",
-        filename=output_filename,
-    )
-    command.execute()
-
-    with open(
-        path_problem_solver("JSONfiles") + "\\" + output_filename + ".json", "r"
-    ) as file:
-        summoner_spells_data = json.load(file)
+    def on_spells(summoner_spells_data: dict) -> None:
+        spell_ids = summoner_spells_data["spells"]
 
-    spell_ids = summoner_spells_data["spells"]
+        with open(
+            path_problem_solver("data") + "\\" + "summoner_spells.json", "rb"
+        ) as spells_file:
+            spells = json_codec.load(spells_file)
 
-    with open(
-        path_problem_solver("data") + "\\" + "summoner_spells.json", "r+"
-    ) as spells_file:
-        spells = json.load(spells_file)
+        callback([spell for spell, id in spells if id in spell_ids])
 
-    return [spell for spell, id in spells if id in spell_ids]
+    get_summoner_id(lambda summoner_id: _load_endpoint(f"/lol-collections/v1/inventories/{summoner_id}/spells",
+                                                       output_filename, on_spells))
 
 
-def get_user_rune_pages(output_filename="users_rune_pages") -> List[Tuple[str, int]]:
-    """Functions fetches user's rune pages and saves them in a format of a list of tuples, where each tuple
-    consists of the rune page's name and the rune page's id.
+def get_user_rune_pages(callback: Callable[[List[Tuple[str, int]]], None],
+                        output_filename="users_rune_pages") -> None:
+    """Functions fetches user's rune pages and passes them to the callback in a format of a list of tuples, where each
+    tuple consists of the rune page's name and the rune page's id.
     """
 
-    command = EndpointSaver(
-        reqs="/lol-perks/v1/pages", filename=output_filename
-    )
-    command.execute()
-
-    with open(
-        path_problem_solver("JSONfiles") + "\\" + output_filename + ".json", "r"
-    ) as file:
-        rune_pages = json.load(file)
-
-    return [(rune_page["name"], rune_page["id"]) for rune_page in rune_pages]
+    _load_endpoint("/lol-perks/v1/pages", output_filename,
+                   lambda rune_pages: callback([(rune_page["name"], rune_page["id"]) for rune_page in rune_pages]))
 
 
 def save_settings(filepath: str, settings: dict) -> saved_to_json:
     """Saves provided settings to a JSON file, which filepath is also given in the arguments."""
 
-    with open(filepath, "w") as save_file:
-        json.dump(settings, save_file, indent=4)
+    # settings are edited by people as well, keep them readable
+    json_codec.dump_file(settings, filepath, pretty=True)
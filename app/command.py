@@ -1,14 +1,29 @@
 from abc import ABC, abstractmethod, abstractclassmethod
 import asyncio
+import concurrent.futures
+import logging
+import random
+import time
+from collections import deque
+from enum import IntEnum
 import events
-from typing import Optional, final, Dict
+from typing import Any, Callable, Hashable, NamedTuple, Optional, final, Dict
 
+import aiohttp
 from lcu_driver import connector
 from packages.JSONsaver import JSONSaver
+from packages import json_codec
 from packages.champNameIdMapper import ChampNameIdMapper
+from packages.notifier import UriNotifier
+from packages.state_store import (StateStore, UriState, LOBBY_URI, SESSION_URI,
+                                  QUEUE_URI, SEARCH_URI, READY_CHECK_URI)
+from packages.lcu_connection import ConnectionLifecycle, PhaseScopedEventManager
+from packages.ws_monitor import WebsocketMonitor
+from packages.command_scheduler import CommandScheduler
 
 from termcolor import colored
 from pprint import pprint
+from packages.logger import get_logger, LogTag, TAGS, OK
 from session_manager import SessionManager, Action, TeamMember
 # from packages.launcher import LobbyState
 # from menu import MenuApp
@@ -16,88 +31,348 @@ from session_manager import SessionManager, Action, TeamMember
 
 REQUEST_SUCCESSFUL_STATUSES = list(range(200, 209))
 
+# statuses after which the same request may succeed, e.g. while the
+# client is busy or one of its plugins has not answered yet
+TRANSIENT_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+# methods whose requests can be repeated without changing the outcome
+IDEMPOTENT_METHODS = frozenset({'get', 'put', 'patch', 'delete'})
+
+logger = get_logger('command')
+
+
+class Priority(IntEnum):
+    '''Order in which CommandScheduler starts the commands.'''
+
+    CRITICAL = 0        # accept, hover, lock in: the client is waiting
+    NORMAL = 1
+    BACKGROUND = 2      # rune pages, summoner spells, dumps of endpoints
+
+
+class CommandResult(NamedTuple):
+    '''Outcome of an executed command, see Command.run.'''
+
+    command: str                # name of the command's class
+    ok: bool
+    status: Optional[int]       # status of the last LCU request, if any
+    value: Any                  # what _execute has returned
+    error: Optional[BaseException]
+    elapsed: float              # seconds since run(), waits included
+    attempts: int               # LCU requests sent, retries included
+
 
 class Command(ABC):
-    OK_S = f"[{colored(' OK  ', 'green')}]"
-    ERR_S = f"[{colored('ERROR', 'red')}]"
-    INFO_S = f"[{colored('INFO ', 'blue')}]"
+    # tags can be printed as well as passed to log() as a level
+    OK_S: LogTag = TAGS[OK]
+    ERR_S: LogTag = TAGS[logging.ERROR]
+    INFO_S: LogTag = TAGS[logging.INFO]
+    DEBUG_S: LogTag = TAGS[logging.DEBUG]
 
     receiver = None
     actual_state = None
+    state = None
     session_manager: SessionManager = None
+    notifier: UriNotifier = None
+    store: StateStore = None
+    lifecycle: ConnectionLifecycle = None
+    subscriptions: PhaseScopedEventManager = None
+    monitor: WebsocketMonitor = None
+    scheduler: CommandScheduler = None
     lock = asyncio.Lock()
 
+    # seconds the command may take, including the wait for the login
+    TIMEOUT: float = 10.0
+    PRIORITY: Priority = Priority.NORMAL
+
+    # retries of the failed requests, see _request
+    RETRY_DEADLINE: float = 2.0     # seconds since the first attempt
+    RETRY_MIN_DELAY: float = 0.1
+    RETRY_MAX_DELAY: float = 0.8
+
     def __init__(self):
+        # status of the last request sent by the command, see _request
+        self.status: Optional[int] = None
+        self.attempts: int = 0
+
         if Command.receiver:
             # self.receiver = receiver
-            Command.connection = Command.receiver.connection
             Command._loop = Command.receiver.loop
-            Command.locals = Command.connection.locals
+
+            # the connection does not exist until the client is found
+            if Command.receiver.connection:
+                Command._bind(Command.receiver.connection)
 
         else:
-            print(self.INFO_S, 'receiver is None type', sep=' ')
+            self.log(self.INFO_S, 'receiver is None type')
+
+    @staticmethod
+    def log(tag: LogTag, msg: str, *args) -> None:
+        '''Log the message on the level of the tag, args are formatted
+        into msg (%-style) only if the message is going to be emitted.'''
+
+        logger.log(tag.level, msg, *args)
+
+    @staticmethod
+    def _bind(connection) -> None:
+        Command.connection = connection
+        Command.locals = connection.locals
+
+    def execute(self, callback: Callable[[CommandResult], Any] = None,
+                timeout: float = None) -> concurrent.futures.Future:
+        '''Schedule the command on the connector's loop, can be called
+        from any thread. The returned future resolves to a CommandResult.
+
+        callback, if given, is called with the result once the command
+        has finished. It runs on the loop's thread, so it must not block,
+        the UI should hand the result over to its own thread.'''
+
+        future = asyncio.run_coroutine_threadsafe(self.run(timeout),
+                                                  Command._loop)
+        if callback:
+            # cancelled e.g. when the loop is stopped, there is no result
+            future.add_done_callback(
+                lambda done: done.cancelled() or callback(done.result()))
+
+        return future
+
+    async def run(self, timeout: float = None) -> CommandResult:
+        '''Execute the command on the loop and wait for its result. Errors
+        (including the timeout, TIMEOUT unless given) are not raised, they
+        are logged and returned in the result.
+
+        The command has succeeded if it hasn't raised, _execute hasn't
+        returned False and the status of its last request is successful.
+
+        The command is run by the scheduler, according to its PRIORITY.
+        If an equal command (see get_key) is already in flight, its result
+        is returned instead of running this one. The timeout covers the
+        wait in the scheduler's queue as well, a command which has not
+        started in time is not run at all.'''
+
+        started: float = time.monotonic()
+        timeout = timeout or self.TIMEOUT
+
+        if Command.scheduler is None:
+            return await self._run_with_result(started, timeout)
+
+        job = Command.scheduler.submit(
+            lambda: self._run_with_result(started, timeout),
+            self.PRIORITY, self.get_key())
+
+        # a caller which gives up must not cancel a job others may share,
+        # the timeout is reported by the job (_run_with_result)
+        try:
+            return await asyncio.wait_for(asyncio.shield(job), timeout)
+
+        except asyncio.TimeoutError as e:
+            return CommandResult(type(self).__name__, False, None, None, e,
+                                 time.monotonic() - started, 0)
+
+    def get_key(self) -> Hashable:
+        '''Commands with the same key (other than None) do the same thing,
+        only one of them runs at a time. None by default, every command
+        is run.'''
+
+        return None
+
+    async def _run_with_result(self, started: float,
+                               timeout: float) -> CommandResult:
+        name: str = type(self).__name__
+        self.status = None
+        self.attempts = 0
+
+        # what is left after the wait in the queue, if nothing the caller
+        # has already given up
+        remaining: float = started + timeout - time.monotonic()
+        if remaining <= 0:
+            self.log(Command.ERR_S, '%s has timed out before it has started.',
+                     name)
+            return CommandResult(name, False, None, None,
+                                 asyncio.TimeoutError(), timeout, 0)
+
+        try:
+            value = await asyncio.wait_for(self._run(), remaining)
+
+        except asyncio.TimeoutError as e:
+            self.log(Command.ERR_S, '%s has timed out.', name)
+            return CommandResult(name, False, self.status, None, e,
+                                 time.monotonic() - started, self.attempts)
+
+        except Exception as e:
+            logger.exception('%s has failed.', name)
+            return CommandResult(name, False, self.status, None, e,
+                                 time.monotonic() - started, self.attempts)
+
+        ok: bool = value is not False and (
+            self.status is None or self.status in REQUEST_SUCCESSFUL_STATUSES)
+
+        return CommandResult(name, ok, self.status, value, None,
+                             time.monotonic() - started, self.attempts)
+
+    async def _run(self):
+        '''Wait until the user is logged in instead of assuming that
+        the connection exists, then execute the command.'''
+
+        Command._bind(await Command.lifecycle.wait_logged_in())
+        return await self._execute()
+
+    async def _request(self, method: str, endpoint: str, **kwargs):
+        '''Send a request to the LCU, its status becomes the status of
+        the command.
+
+        A request which has failed transiently (a TRANSIENT_STATUSES
+        response or a connection error) is sent again after a jittered,
+        doubling delay until RETRY_DEADLINE passes, but only if repeating
+        it is safe: always for the IDEMPOTENT_METHODS and for requests
+        which have not reached the client, otherwise (POST) when
+        _is_retry_safe says so. The last response is returned, or the
+        last connection error is raised.'''
+
+        deadline: float = time.monotonic() + self.RETRY_DEADLINE
+        delay: float = self.RETRY_MIN_DELAY
+
+        while True:
+            self.attempts += 1
+            res, error = None, None
+
+            try:
+                res = await self.connection.request(method, endpoint, **kwargs)
+
+            except aiohttp.ClientError as e:
+                error = e
+
+            else:
+                self.status = res.status
+                if res.status not in TRANSIENT_STATUSES:
+                    return res
+
+            # full jitter, retries of concurrent commands do not line up
+            wait: float = random.uniform(0, delay)
+            delay = min(delay * 2, self.RETRY_MAX_DELAY)
+
+            if time.monotonic() + wait > deadline or not (
+                    isinstance(error, aiohttp.ClientConnectorError)
+                    or await self._is_retry_safe(method, endpoint)):
+                if error:
+                    raise error
+                return res
+
+            self.log(Command.DEBUG_S, '%s %s has failed (%s), retrying in %.0f ms.',
+                     method.upper(), endpoint, error or res.status, wait * 1000)
+            await asyncio.sleep(wait)
+
+    async def _is_retry_safe(self, method: str, endpoint: str) -> bool:
+        '''Whether the failed request can be sent again. Only the requests
+        of the IDEMPOTENT_METHODS by default, commands which know when
+        their POST does no harm being repeated override it.'''
+
+        return method.lower() in IDEMPOTENT_METHODS
 
-    def execute(self):
-        return asyncio.run_coroutine_threadsafe(self._execute(), Command._loop)
-        
     @abstractmethod
     async def _execute(self):
         pass
 
 class MatchFinder(Command):
+    def get_key(self) -> Hashable:
+        return 'MatchFinder'
+
+    async def _is_retry_safe(self, method: str, endpoint: str) -> bool:
+        # the search is started once, the failed request has not started it
+        search = Command.store.get_data(SEARCH_URI)
+        return not search or search.get('searchState') != 'Searching'
 
     async def _execute(self):
 
-        res = await self.connection.request('post', '/lol-lobby/v2/lobby/matchmaking/search')
+        res = await self._request('post', '/lol-lobby/v2/lobby/matchmaking/search')
         if res.status == 204:
-            print(self.OK_S,
-                    'Game searching has been started.')
+            self.log(self.OK_S, 'Game searching has been started.')
 
         else:
-            print(self.ERR_S, f'error: {res.status}')
+            self.log(self.ERR_S, 'error: %s', res.status)
             # _error_whit_connection(res)
 
 class Canceller(Command):
+    def get_key(self) -> Hashable:
+        return 'Canceller'
+
     async def _execute(self):
 
-        res = await self.connection.request('delete', '/lol-lobby/v2/lobby/matchmaking/search')
+        res = await self._request('delete', '/lol-lobby/v2/lobby/matchmaking/search')
         if res.status == 204:
-            print(self.OK_S,
-                    'Gamer searching has been cancelled.')
+            self.log(self.OK_S, 'Gamer searching has been cancelled.')
 
         else:
-            print(self.ERR_S, f'error: {res.status}')
+            self.log(self.ERR_S, 'error: %s', res.status)
             # _error_whit_connection(res)
     
 class Acceptor(Command):
+    PRIORITY: Priority = Priority.CRITICAL
+
+    # accept latencies (in seconds) of the recent games
+    latencies: deque = deque(maxlen=50)
+
+    def __init__(self, found_at: float = None):
+        '''found_at is the time.monotonic() the ready check has been
+        received at, if given the accept latency is recorded.'''
+
+        super().__init__()
+        self.found_at: float = found_at
+
+    def get_key(self) -> Hashable:
+        return 'Acceptor'
+
+    async def _is_retry_safe(self, method: str, endpoint: str) -> bool:
+        return _is_ready_check_in_progress()
+
     async def _execute(self):
 
         reqs = '/lol-matchmaking/v1/ready-check/accept'
-        res = await self.connection.request('post', reqs)
+        res = await self._request('post', reqs)
 
-        if res.status == 200:
-            print(self.OK_S,
-                    'Game has been accepted.', sep=' ')
+        if res.status == 200 and self.found_at is not None:
+            latency = time.monotonic() - self.found_at
+            Acceptor.latencies.append(latency)
+            self.log(self.OK_S, 'Game has been accepted in %.0f ms.',
+                     latency * 1000)
+
+        elif res.status == 200:
+            self.log(self.OK_S, 'Game has been accepted.')
 
         else:
-            print(self.ERR_S, f'error: {res.status}')
+            self.log(self.ERR_S, 'error: %s', res.status)
             # _error_whit_connection(res)
 
 class Decliner(Command):
+    PRIORITY: Priority = Priority.CRITICAL
+
+    def get_key(self) -> Hashable:
+        return 'Decliner'
+
+    async def _is_retry_safe(self, method: str, endpoint: str) -> bool:
+        return _is_ready_check_in_progress()
+
     async def _execute(self):
 
         reqs = '/lol-matchmaking/v1/ready-check/decline'
-        res = await self.connection.request('post', reqs)
+        res = await self._request('post', reqs)
 
         if res.status == 200:
-            print(self.OK_S,
-                    'Game has been declined.', sep=' ')
+            self.log(self.OK_S, 'Game has been declined.')
 
         else:
-            print(self.ERR_S, f'error: {res.status}')
+            self.log(self.ERR_S, 'error: %s', res.status)
             # _error_whit_connection(res)
 
+def _is_ready_check_in_progress() -> bool:
+    '''Whether the ready check still waits for the responses. Until then
+    accepting (or declining) again has the same outcome as doing it once.'''
+
+    ready_check = Command.store.get_data(READY_CHECK_URI)
+    return bool(ready_check) and ready_check.get('state') == 'InProgress'
+
 class WS_JSONSaver(Command):
+    PRIORITY: Priority = Priority.BACKGROUND
+
     def __init__(self, spinner, textinput):
         super().__init__()
         # FIXME: this class needs refactoring
@@ -111,112 +386,50 @@ class WS_JSONSaver(Command):
             self.filename = textinput.text
         self.saver = JSONSaver()
 
+    # names which can be chosen in the spinner
+    URIS: Dict[str, str] = {
+        'session': SESSION_URI,
+        'lobby': LOBBY_URI,
+        'queue': QUEUE_URI,
+        'search': SEARCH_URI,
+    }
 
     async def _execute(self):
+        for name, uri in self.URIS.items():
+            if self.text != name and self.text != 'all':
+                continue
 
-        if self.text == 'session' or self.text == 'all':
-            try:
-                to_save = Command.locals['session'].data
+            state: UriState = Command.store.get(uri)
 
-            except KeyError:
-                print(Command.ERR_S, 'session is empty')
+            if state is None:
+                self.log(Command.ERR_S, '%s is empty', name)
 
             else:
-                print(Command.OK_S,
-                    f'the saving the {self.text}.',
-                    f'Name of file: {self.filename}.',
-                    sep=' ')
-                    
-                self.saver.save(what=to_save,
-                                filename=self.filename,
-                                type=self.text)
-
+                saved_as = self.saver.save(what=state.data,
+                                           filename=self.filename,
+                                           type=self.text,
+                                           pretty=True)
 
-        if self.text == 'lobby' or self.text == 'all':
-            try:
-                to_save = Command.locals['lobby'].data
-
-            except KeyError:
-                print(Command.ERR_S, 'lobby is empty')
-
-            else:
-                name = self.saver.save(what=to_save, 
-                                       filename=self.filename,
-                                       type=self.text)
-
-                print(Command.OK_S,
-                    f'the saving the "{self.text}".',
-                    f'Name of file: "{name}".',
-                    sep=' ')
-                  
-
-        if self.text == 'queue' or self.text == 'all':
-            try:
-                to_save = Command.locals['queue'].data
-
-            except KeyError:
-                print(Command.ERR_S, 'queue is empty')
-
-            else:
-                name = self.saver.save(what=to_save, 
-                                       filename=self.filename,
-                                       type=self.text)
-
-                print(Command.OK_S,
-                    f'the saving the "{self.text}".',
-                    f'Name of file: "{name}".',
-                    sep=' ')
-
-        if self.text == 'search' or self.text == 'all':
-            try:
-                to_save = Command.locals['search'].data
-
-            except KeyError:
-                print(Command.ERR_S, 'search is empty')
-
-            else:
-                name = self.saver.save(what=to_save, 
-                                       filename=self.filename,
-                                       type=self.text)
-
-                print(Command.OK_S,
-                    f'the saving the "{self.text}".',
-                    f'Name of file: "{name}".',
-                    sep=' ')
+                self.log(Command.OK_S, 'the saving the "%s". Name of file: "%s".',
+                         name, saved_as)
 
 class AllyBansGetter(Command):
     async def _execute(self):
-        champs = ChampNameIdMapper.get_champion_dict(order='reversed')
-        my_team_bans = self.locals['session'].data['bans']['myTeamBans']
-        bans = (champs[str(ban)] for ban in my_team_bans)
-        
-        try:
-            print('Our team bans: |', *[colored(f'{b}', 'cyan') + ' |' for b in bans])
+        summary = Command.session_manager.get_summary()
+        bans = summary.my_team_bans if summary else ()
 
-        except KeyError as e:
-            print(f'key error:\n{e}')
-        
-        # except Exception as e:
-        #     print(e)
-        #     print(e.with_traceback)
+        print('Our team bans: |', *[colored(f'{b}', 'cyan') + ' |' for b in bans])
 
 class EnemyBansGetter(Command):
     async def _execute(self):
-        champs = ChampNameIdMapper.get_champion_dict(order='reversed')
-        enemy_team_bans = self.locals['session'].data['bans']['theirTeamBans']
-        bans = (champs[str(ban)] for ban in enemy_team_bans)
-        
-        try:
-            print('enemy team bans: |', *[colored(f'{b}', 'cyan') + ' |' for b in bans])
+        summary = Command.session_manager.get_summary()
+        bans = summary.their_team_bans if summary else ()
 
-        except KeyError as e:
-            print(f'key error:\n{e}')
-        
-        # except Exception as e:
-        #     print(e)
-        #     print(e.with_traceback)
+        print('enemy team bans: |', *[colored(f'{b}', 'cyan') + ' |' for b in bans])
 
 class Hover(Command):
+    PRIORITY: Priority = Priority.CRITICAL
+
     def __init__(self, champion: str = None):
         super().__init__()
 
@@ -230,9 +443,11 @@ class Hover(Command):
                 self.champion = champs[champion]
 
             except KeyError:
-                print(Command.ERR_S,
-                      'Invalid name of the champion.',
-                      'Note, that this field is case-sensitive', sep=' ')
+                self.log(Command.ERR_S, 'Invalid name of the champion. '
+                         'Note, that this field is case-sensitive')
+
+    def get_key(self) -> Hashable:
+        return ('Hover', self.champion)
 
     async def _execute(self):
         champ_id = self.champion
@@ -242,22 +457,21 @@ class Hover(Command):
             action_id = my_active_action.id
             reqs = f'/lol-champ-select/v1/session/actions/{action_id}'
 
-            res = await self.connection.request('patch', reqs,
+            res = await self._request('patch', reqs,
                                                 data={'championId': champ_id})
 
             if res.status in REQUEST_SUCCESSFUL_STATUSES:
-                print(Command.OK_S,
-                    'successfully changed hovered champ to:',
-                        colored(self.champion, 'red'), sep=' ')
+                self.log(Command.OK_S, 'successfully changed hovered champ to: %s',
+                         self.champion)
 
             else:
-                print(Command.INFO_S,
-                    'something went wrong while hovering the champion',
-                        colored(self.champion, 'red'), sep=' ')
-                print(Command.ERR_S, f"Error code: {res.status}")
+                self.log(Command.ERR_S, 'something went wrong while hovering '
+                         'the champion %s. Error code: %s',
+                         self.champion, res.status)
         
         else:
-            print(Command.INFO_S, "Your active action does not exist.")
+            self.log(Command.INFO_S, "Your active action does not exist.")
+            return False
     
 class PickIntent(Command):
     def __init__(self, champion: str = None):
@@ -273,9 +487,11 @@ class PickIntent(Command):
                 self.champion: int = int(champs[champion])
 
             except KeyError:
-                print(Command.ERR_S,
-                      'Invalid name of the champion.',
-                      'Note, that this field is case-sensitive', sep=' ')
+                self.log(Command.ERR_S, 'Invalid name of the champion. '
+                         'Note, that this field is case-sensitive')
+
+    def get_key(self) -> Hashable:
+        return ('PickIntent', self.champion)
 
     async def _execute(self):
         champ_id: int = self.champion
@@ -283,22 +499,20 @@ class PickIntent(Command):
         # action_id = my_active_action.id
         reqs = f'/lol-champ-select/v1/session/my-selection'
 
-        res = await self.connection.request('patch', reqs,
+        res = await self._request('patch', reqs,
                                             data={'championPickIntent': champ_id})
         # res = await self.connection.request('patch', reqs,
         #                                     data={'selectedSkinId': champ_id})
 
 
         if res.status in REQUEST_SUCCESSFUL_STATUSES:
-            print(Command.OK_S,
-                'successfully changed intent champ to:',
-                    colored(self.champion, 'red'), sep=' ')
+            self.log(Command.OK_S, 'successfully changed intent champ to: %s',
+                     self.champion)
 
         else:
-            print(Command.INFO_S,
-                'something went wrong while intenting the champion',
-                    colored(self.champion, 'red'), sep=' ')
-            print(Command.ERR_S, f"Error code: {res.status}")
+            self.log(Command.ERR_S, 'something went wrong while intenting '
+                     'the champion %s. Error code: %s',
+                     self.champion, res.status)
     
 
 class HoverGetter(Command):
@@ -315,51 +529,56 @@ class HoverGetter(Command):
 
 class MyTeamChampsGetter(Command):
     async def _execute(self):
-        champs = ChampNameIdMapper.get_champion_dict(order='reversed')
-        my_team_picks = self.locals['session'].data['myTeam']
-        bans = (champs.get(str(ban['championId'])) for ban in my_team_picks)
-        
-        try:
-            print('Our team picks: |', *[colored(f'{b}', 'cyan') + ' |' for b in bans])
+        summary = Command.session_manager.get_summary()
+        picks = summary.my_team_picks if summary else ()
 
-        except KeyError as e:
-            print(f'key error:\n{e}')
+        print('Our team picks: |', *[colored(f'{p}', 'cyan') + ' |' for p in picks])
 
 class EnemyTeamChampsGetter(Command):
     async def _execute(self):
-        champs = ChampNameIdMapper.get_champion_dict(order='reversed')
-        my_team_picks = self.locals['session'].data['theirTeam']
-        bans = (champs.get(str(ban['championId'])) for ban in my_team_picks)
-        
-        try:
-            print('enemy team picks: |', *[colored(f'{b}', 'cyan') + ' |' for b in bans])
+        summary = Command.session_manager.get_summary()
+        picks = summary.their_team_picks if summary else ()
 
-        except KeyError as e:
-            print(f'key error:\n{e}')
+        print('enemy team picks: |', *[colored(f'{p}', 'cyan') + ' |' for p in picks])
 
 class MyPositionGetter(Command):
     async def _execute(self):
+        summary = Command.session_manager.get_summary()
 
-        # TODO: this shoudl be available globally
-        reqs = '/lol-summoner/v1/current-summoner'
-        res = await self.connection.request('get', reqs)
+        if summary is None:
+            print('You are not in the champion select.')
 
-        data = await res.json()
-        SUMMONER_ID = data['summonerId']
+        elif summary.my_position:
+            print(f"Your position: {summary.my_position}")
 
-        for player in self.locals['session'].data['myTeam']:
-            if player['summonerId'] == SUMMONER_ID:
-                if player['assignedPosition']:
-                    print(f"Your position: {player['assignedPosition']}")
-
-                else:
-                    print('In this mode positioning is disabled')
+        else:
+            print('In this mode positioning is disabled')
 
 class Complete(Command):
+    PRIORITY: Priority = Priority.CRITICAL
+
+    def __init__(self):
+        super().__init__()
+        self.action_id: int = None
+
+    def get_key(self) -> Hashable:
+        return 'Complete'
+
+    async def _is_retry_safe(self, method: str, endpoint: str) -> bool:
+        '''The action may be completed again only while the session still
+        shows it in progress, a completed action is never sent twice.'''
+
+        action: Action = self.session_manager.get_action(self.action_id)
+        return bool(action) and action.is_in_progress and not action.completed
 
     async def _execute(self):
         champs = ChampNameIdMapper.get_champion_dict(order='normal')
         my_active_action: Action = self.session_manager.get_my_action()
+
+        if my_active_action is None:
+            self.log(Command.INFO_S, "Your active action does not exist.")
+            return False
+
         champ_id: int = my_active_action.champion_id
 
         # active_action: Action = self.session_manager.get_action_in_progress()
@@ -371,12 +590,12 @@ class Complete(Command):
         # res = await connection.request('patch', reqs,
         #                                data={'isInProgress': False})
 
-        action_id: int = my_active_action.id
-        reqs = f'/lol-champ-select/v1/session/actions/{action_id}/complete'
-        res = await self.connection.request('post', reqs)
+        self.action_id = my_active_action.id
+        reqs = f'/lol-champ-select/v1/session/actions/{self.action_id}/complete'
+        res = await self._request('post', reqs)
 
         if res.status in REQUEST_SUCCESSFUL_STATUSES:
-            print(Command.OK_S, 'Champion pick compleated.')
+            self.log(Command.OK_S, 'Champion pick compleated.')
             # action_type: str = my_active_action.type
             # act = lambda: action_type + 'n' if action_type == 'ban'\
             #                                 else action_type
@@ -385,10 +604,11 @@ class Complete(Command):
             #         colored(champs[str(champ_id)], 'red'), sep=' ')
         
         else:
-            print(Command.ERR_S,
-                  f'request result: {res.status}')
+            self.log(Command.ERR_S, 'request result: %s', res.status)
 
 class EndpointSaver(Command):
+    PRIORITY: Priority = Priority.BACKGROUND
+
     def __init__(self, reqs: str, filename: str):
         super().__init__()
 
@@ -397,211 +617,161 @@ class EndpointSaver(Command):
         self.saver = JSONSaver()
 
     async def _execute(self):
-        res = await self.connection.request('get', self.reqs)
+        res = await self._request('get', self.reqs)
 
         if res.status in REQUEST_SUCCESSFUL_STATUSES:
-            print(Command.OK_S,
-                    f'endpoint requested successfully', sep=' ')
+            self.log(Command.OK_S, 'endpoint requested successfully')
 
-            data = await res.json()
+            data = json_codec.loads(await res.read())
             name = self.saver.save(what=data,
                                    filename=self.filename,
                                    type='customEndpoint')
         
         else:
-            print(Command.ERR_S,
-                  f'error no.: {res.status}', sep=' ')
+            self.log(Command.ERR_S, 'error no.: %s', res.status)
 
 
 # Made for Launcher class:
 class InitState(Command):
     async def _execute(self):
         Command.actual_state.initialized = True
+        if Command.state:
+            Command.state.update_subscriptions()
+            Command.state.phase_tracker.apply()
+
+        Command.notifier.notify_all()
 
 
 class DeinitState(Command):
     async def _execute(self):
         Command.actual_state.initialized = False
-        Canceller().execute()
-
+        if Command.state:
+            Command.state.update_subscriptions()
 
-class LobbyGetter(Command):
-    def __init__(self):
-        super().__init__()
+        Command.notifier.notify_all()
+        Canceller().execute()
 
-        self._return = None # for internal usage only!
-        self.data = None
-        self.type = None
 
+class HealthGetter(Command):
     async def _execute(self):
-        '''Do not modify locals['lobby'] in this method!'''
+        health = Command.monitor.get_health()
 
-        try:
-            # If it does exit that means it was created by websocket
-            # and containt data as well as type fields
-            self._return = Command.locals['lobby']
+        print(Command.INFO_S, 'Websocket health:')
+        for name, value in health.items():
+            if isinstance(value, float):
+                value = round(value, 3)
+            print(f'\t-{name}: {value}')
 
-        except KeyError:
-            print(Command.ERR_S,
-                  'lobby object not found in locals!')
-            print(Command.INFO_S,
-                  'requesting for the data.')
+        # the ingest queues of the websocket events
+        queue = Command.subscriptions.queue
+        print(Command.INFO_S, 'Event queues (depth: %s, dropped: %s):'
+              % (queue.get_depth(), queue.get_dropped()))
+        for uri, stats in queue.get_stats().items():
+            print(f'\t-{uri}: {stats}')
 
-            await self.request_data()
+        # waits of the commands for a free worker of the scheduler
+        print(Command.INFO_S, 'Commands (queued: %s):'
+              % Command.scheduler.get_depth())
+        for priority, stats in Command.scheduler.get_stats().items():
+            print(f'\t-{priority}: {stats}')
 
-        else:
-            if self._return: 
-                if self._return.data:
-                    self.data = self._return.data
-
-                self.type = self._return.type
-
-            # If data is empty that means that lobby has been removed
-            # else:
-            #     print(Command.INFO_S,
-            #         'data is NoneType\n')
-                
-            #     self._reutrn
-            #     self.type = self._return.type
-        
-    async def request_data(self):
-        '''Use this method force data acqusition '''
+        return health
 
-        reqs = '/lol-lobby/v2/lobby'
-        res = await self.connection.request('get', reqs)
-        if res.status in list(range(200, 210)):
-            print(Command.INFO_S, 'Getting lobby data')
-            self.data = await res.json()
-            self.type = 'Manual'
-        
-        else:
-            print(Command.ERR_S, 'Requested data cannot be get')
-            self.data = None
-            self.type = None
 
+class StateGetter(Command):
+    '''Base of the getters of the websocket state kept in Command.store.
+    The getter remembers the seq of the state it has read, `changed`
+    tells whether the last execution found a new one, so callers which
+    keep the getter can skip the work otherwise.'''
 
-    def _get_return(self):
-        '''Return direct return from Command.locals['lobby']'''
-        return self._return
-    
-    def get_data(self):
-        '''json file describing lobby (acquired from locals or requested)'''
-        return self.data
-    
-    def get_type(self):
-        '''type can be Update or Delete or Manual.
-        take value only if data is acquired from websocket.'''
-        return self.type
+    URI: str = None
 
-
-class SearchGetter(Command):
     def __init__(self):
         super().__init__()
-        self._return = None
 
+        self._return: UriState = None # for internal usage only!
         self.data = None
         self.type = None
-        # self.arg = arg_ready_check
+        self.seq: int = 0
+        self.changed: bool = False
 
     async def _execute(self):
-        '''Do not modify locals['search'] in this method!'''
+        '''Do not modify the returned state in this method!'''
 
-        try:
-            # If it does exit that means it was created by websocket
-            # and containt data as well as type fields
-            self._return = Command.locals['search']
+        self._return = Command.store.get(self.URI)
+        self.changed = False
 
-        except KeyError:
-            print(Command.ERR_S,
-                  'search object not found in locals.')
+        if self._return is None:
+            await self._on_missing()
 
-        else:
-            if self._return:
-                if self._return.data:
-                    self.data = self._return.data
+        elif self._return.seq != self.seq:
+            self.seq = self._return.seq
+            self.data = self._return.data
+            self.type = self._return.type
+            self.changed = True
 
-                self.type = self._return.type
+    async def _on_missing(self):
+        # normal until the uri is primed, e.g. right after a transition
+        self.log(Command.DEBUG_S, '%s state not found in the store.', self.URI)
 
     def _get_return(self):
-        '''Return direct return from Command.locals['search']'''
+        '''Return direct return from Command.store'''
         return self._return
-    
+
     def get_data(self):
-        '''json file describing lobby (acquired from locals or requested)'''
+        '''json file describing the uri (None if it has been deleted)'''
         return self.data
-    
+
     def get_type(self):
-        '''type can be Update or Delete or Manual.
-        take value only if data is acquired from websocket'''
+        '''type can be Update, Create or Delete (or Manual if the data
+        has been requested).'''
         return self.type
 
+    def get_seq(self):
+        return self.seq
 
-class SessionGetter(Command):
-    def __init__(self):
-        super().__init__()
 
-        self._return = None
-        self.data = None
-        self.type = None
+class LobbyGetter(StateGetter):
+    URI: str = LOBBY_URI
 
-    async def _execute(self):
-        '''Do not modify locals['session'] in this method'''
+    async def _on_missing(self):
+        self.log(Command.DEBUG_S, 'lobby object not found in the store, '
+                 'requesting for the data.')
 
-        try:
-            self._return = Command.locals['session']
+        await self.request_data()
 
-        except KeyError:
-            print(Command.ERR_S,
-                  'session object not found in session\n')
+    async def request_data(self):
+        '''Use this method force data acqusition '''
 
+        reqs = '/lol-lobby/v2/lobby'
+        res = await self._request('get', reqs)
+        if res.status in list(range(200, 210)):
+            self.log(Command.INFO_S, 'Getting lobby data')
+            self.data = json_codec.loads(await res.read())
+            self.type = 'Manual'
+        
         else:
-            if self._return:
-                if self._return.data:
-                    self.data = self._return.data
-                
-                self.type = self._return.type
+            self.log(Command.ERR_S, 'Requested data cannot be get')
+            self.data = None
+            self.type = None
 
-    def _get_return(self):
-        return self._return
-    
-    def get_data(self):
-        return self.data
-    
-    def get_type(self):
-        return self.type
+        self.changed = True
 
 
-class QueueGetter(Command):
-    def __init__(self):
-        super().__init__()
+class SearchGetter(StateGetter):
+    URI: str = SEARCH_URI
 
-        self._return = None
-        self.data = None
-        self.type = None
 
-    async def _execute(self):
-        try:
-            data = Command.locals['queue']
+class ReadyCheckGetter(StateGetter):
+    URI: str = READY_CHECK_URI
 
-        except KeyError:
-            print(Command.ERR_S,
-                  'queue object not found in queue\n')
 
-        else:
-            if self._return:
-                if self._return.data:
-                    self.data = self._return.data
+class SessionGetter(StateGetter):
+    URI: str = SESSION_URI
 
-                self.type = self._return.type
 
-    def _get_return(self):
-        return self._return
-    
-    def get_data(self):
-        return self.data
-    
-    def get_type(self):
-        return self.type
+class QueueGetter(StateGetter):
+    URI: str = QUEUE_URI
 
 
 class EndpointSender(Command):
@@ -612,8 +782,13 @@ class EndpointSender(Command):
         request_data: dictionary with necessary request body.
         request_type: type of the request it can be POST, PUT and DELETE(GET request doesn't make sense here).
 
+    PUT and DELETE requests are sent again if they fail transiently, POST requests (e.g. a new rune page) are not,
+    see Command._request.
+
     """
 
+    PRIORITY: Priority = Priority.BACKGROUND
+
     def __init__(self, request: str, request_type: str, request_data: dict = None):
         super().__init__()
         self.request = request
@@ -623,14 +798,20 @@ class EndpointSender(Command):
         if self.request_data is None:
             self.request_data = {}
 
+    def get_key(self) -> Hashable:
+        return ('EndpointSender', self.request_type, self.request,
+                json_codec.dumps(self.request_data))
+
     async def _execute(self):
-        result = await self.connection.request(self.request_type, self.request, data=self.request_data)
+        result = await self._request(self.request_type, self.request, data=self.request_data)
         # check if the request was successful
-        print(f'Status dla {self.request}: {result.status};')
+        self.log(Command.DEBUG_S, 'Status dla %s: %s;', self.request, result.status)
         return result.status in REQUEST_SUCCESSFUL_STATUSES
 
 
 class MessagesSender(Command):
+    PRIORITY: Priority = Priority.BACKGROUND
+
     def __init__(self, user_accounts: Dict[str, str], event_type: str):
         super().__init__()
         self.event_type = event_type
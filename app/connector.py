@@ -1,124 +1,227 @@
 from session_manager import SessionManager, Action
-from lcu_driver import Connector
-from termcolor import colored
 from command import Command
 from packages.champNameIdMapper import ChampNameIdMapper
-from pprint import pprint
-
-connector = Connector()
+from packages.lcu_connection import ConnectionLifecycle, PatientConnector
+from packages.notifier import UriNotifier
+from packages.state_store import StateStore, SESSION_URI
+from packages.event_ingest import EventCoalescer
+from packages.ws_monitor import WebsocketMonitor
+from packages.command_scheduler import CommandScheduler
+from packages.logger import get_logger
+from packages import json_codec
+import asyncio
+import logging
+
+import aiohttp
+
+logger = get_logger('connector')
+
+connector = PatientConnector()
 session_manager = SessionManager()
 Command.session_manager = session_manager
 
-# FLAGS
-IS_CONNECTED = False
+# wakes up the Launcher when one of the watched uris has changed
+notifier = UriNotifier()
+Command.notifier = notifier
+
+# latest state of every uri handled below, putting a new one notifies
+# the notifier's listeners
+store = StateStore(notifier)
+Command.store = store
+
+# ready, logged in and disconnected states of the LCU connection
+lifecycle = ConnectionLifecycle()
+Command.lifecycle = lifecycle
+ChampNameIdMapper.lifecycle = lifecycle
+
+# websocket handlers are attached and detached by the Launcher's states
+Command.subscriptions = connector.ws
+
+# heartbeat which reopens the websocket when it stalls or drops
+monitor = WebsocketMonitor(store)
+Command.monitor = monitor
+
+# every command sent to the LCU goes through it, by priority
+scheduler = CommandScheduler()
+Command.scheduler = scheduler
+
+# bursts of websocket events of the same uri are collapsed to the latest
+# one within this window (in seconds)
+WS_COALESCE_WINDOW = 0.1
+coalescer = EventCoalescer(window=WS_COALESCE_WINDOW)
+
+# delays between the login checks while the client shows the login screen
+LOGIN_CHECK_MIN_DELAY = 0.5
+LOGIN_CHECK_MAX_DELAY = 5.0
+
+
 async def wait_for_connection():
-    while True:
-        if IS_CONNECTED:
-            return True
-    
+    return await lifecycle.wait_logged_in()
+
 
 @connector.ready
 async def connect(connection):
-    print(Command.OK_S,
-        'LCU API is ready to be used.')
-    
-    # get summoner name
-    res = await connection.request('get', '/lol-summoner/v1/current-summoner')
+    Command.log(Command.OK_S, 'LCU API is ready to be used.')
+    lifecycle.set_ready(connection)
+
+    # get summoner name, the user may be still on the login screen
+    delay = LOGIN_CHECK_MIN_DELAY
+    try:
+        res = await connection.request('get',
+                                       '/lol-summoner/v1/current-summoner')
+        while res.status != 200 and not connection.closed:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LOGIN_CHECK_MAX_DELAY)
+            res = await connection.request('get',
+                                           '/lol-summoner/v1/current-summoner')
+
+    except aiohttp.ClientError:
+        # the client has been closed on the login screen, the connector
+        # will wait for it to come back
+        return
+
     if res.status == 200:
-        IS_CONNECTED = True
-        data = await res.json()
+        data = json_codec.loads(await res.read())
         SUMMONER_NAME: str = data['internalName']
         SUMMONER_ID: int = data['summonerId']
         SUMMONER_PUUID: str = data['puuid']
 
         session_manager.set_summoner_id(SUMMONER_ID)
 
-        print(Command.OK_S,
-        'Logged in successfully\n',
-        '\t-Currently logged as summoner:',
-        colored(f'{SUMMONER_NAME}\n', attrs=('bold',)),
-        '\t-summoner id:',
-        colored(f'{SUMMONER_ID}\n', attrs=('bold',)),
-        sep=' ')
+        Command.log(Command.OK_S, 'Logged in successfully\n'
+                    '\t-Currently logged as summoner: %s\n'
+                    '\t-summoner id: %s', SUMMONER_NAME, SUMMONER_ID)
         # connection.locals.update({'lobby': None})
         connection.locals.update({'my_summoner_id': SUMMONER_ID})
         connection.locals.update({'my_cell_id': 'Unknown'})
+        Command._bind(connection)
+        lifecycle.set_logged_in()
+        monitor.start(connection)
+
+        if lifecycle.last_downtime is not None:
+            Command.log(Command.OK_S, 'Reconnected after %.1f s.',
+                        lifecycle.last_downtime)
+
+        # continue where the client is, e.g. in the champion select
+        # it has been restarted in
+        if Command.state:
+            Command.state.resume()
 
         status = await ChampNameIdMapper.get_data()
-        print(Command.OK_S,
-            'champion id and name mapped successfully',
-            f' .status: {status}')
+        Command.log(Command.OK_S,
+                    'champion id and name mapped successfully .status: %s',
+                    status)
 
     # else:
     #     MenuApp._error_whit_connection(res)
 
+def session_phase(event) -> tuple:
+    '''Session events with a new timer phase or with other actions in
+    progress must never be delayed, the rest differ mostly by the timer.'''
+
+    if not event.data:
+        return (event.type, None, ())
+
+    in_progress = tuple(action['id'] for turn in event.data['actions']
+                        for action in turn if action['isInProgress'])
+
+    return (event.type, event.data['timer']['phase'], in_progress)
+
+
+def search_phase(event) -> tuple:
+    if not event.data:
+        return (event.type, None, None)
+
+    return (event.type, event.data['searchState'],
+            event.data['readyCheck']['state'])
+
+
+def ready_check_phase(event) -> tuple:
+    if not event.data:
+        return (event.type, None, None)
+
+    return (event.type, event.data['state'], event.data['playerResponse'])
+
+
 @connector.close
 async def disconnect(_):
-    print('The client have been closed!')
-    await connector.stop()
+    '''The connector keeps looking for the client, connect() runs again
+    when it is back, so nothing is stopped here, only the state of the
+    closed connection is dropped.'''
+
+    Command.log(Command.INFO_S, 'The client have been closed! '
+                'Waiting for it to start again.')
+    lifecycle.set_disconnected()
+    monitor.stop()
+    connector.ws.queue.clear()
+    coalescer.reset()
+    store.clear()
+    session_manager.clear()
+
+    if Command.state:
+        Command.state.suspend()
+
+@connector.ws.detached
+def forget(uri: str) -> None:
+    '''The state of a detached uri is not updated anymore, a state which
+    attaches the uri again must wait for the fresh one (it is primed
+    again) instead of taking e.g. the ready check of the last game for
+    the current one.'''
+
+    coalescer.discard(uri)
+    store.discard(uri)
+
+    if uri == SESSION_URI:
+        session_manager.clear()
 
 @connector.ws.register('/lol-lobby/v2/lobby', event_types=('UPDATE',
                                                            'DELETE'))
+@coalescer.coalesce()
 async def lobby(connection, event):
-    # print(type(event))
-
-    # helping variables
-    content: str = str()
-    header: str = colored('The game lobby started.', 'red')
-
     # If event does not exist then function will never called
     # If event lobby is deleted then event exist but it's data is empty
     if event.data:
-        data: dict = {
-            'Game mode': event.data['gameConfig']['gameMode'],
-        }
-
-        # fulfill content variable
-        for key, value in data.items():
-            content += colored(f"\t-{key}: ", 'red')
-            content += colored(f"{value}", 'red', attrs=('bold',))
-            content += '\n'
-
-        # print out data
-        print(header)
-        print(content)
+        logger.debug('The game lobby started.\n\t-Game mode: %s',
+                     event.data['gameConfig']['gameMode'])
 
-    else:
-        data: dict = {'Game mode': None}
-        # event.data = None
-        
-    # ADD EVENT OBJECT TO CONNECTION'S LOCALS IN OREDER TO GAIN OUTER ACCESS
-    connection.locals.update({'lobby': event})
+    store.put(event.uri, event.type, event.data, event.received_at)
     # pprint(connector.ws.registered_uris)
 
 @connector.ws.register('/lol-champ-select/v1/session', event_types=('UPDATE',
                                                                     'DELETE',
                                                                     'CREATE'))
+@coalescer.coalesce(key=session_phase)
 async def session(connection, event):
         if event.type in ('Update', 'Create'):
             if d := event.data:
-                # FIRST MUST BE SYNCED myTeam THAT'S IMPORTANT!!!
-                session_manager.my_team.sync_with_websocket(d['myTeam'])
-                session_manager.actions.sync_with_websocket(d['actions'])
-        
+                changes = session_manager.sync_with_websocket(d)
+
+                if changes and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug('session changes: %s',
+                                 ', '.join(map(str, changes)))
+
+        else:
+            # the champion select has ended
+            session_manager.clear()
+
         my_action: Action = session_manager.get_my_action()
 
-        if my_action:
+        # building the reversed champion dict is not for free
+        if my_action and logger.isEnabledFor(logging.DEBUG):
             champs: dict = ChampNameIdMapper.get_champion_dict(order='reversed')
 
-            try:
-                hovered_champ: str = champs[str(my_action.champion_id)]
+            # If not hovering any champion set None
+            hovered_champ: str = champs.get(str(my_action.champion_id))
 
-            except KeyError:
-                # If not hovering any champion set None
-                hovered_champ: str = None
+            logger.debug('my action: %s', my_action)
+            logger.debug('hovered champion name: %s', hovered_champ)
 
-            pprint(my_action.__dict__)
-            print(f"hovered champion name: {hovered_champ}")
+        if event.type == 'Delete':
+            logger.info('%s session events have been coalesced so far.',
+                        coalescer.get_coalesced(event.uri))
 
 
-        # ADD EVENT OBJECT TO CONNECTION'S LOCALS IN OREDER TO GAIN OUTER ACCESS
-        connection.locals.update({'session': event})
+        store.put(event.uri, event.type, event.data, event.received_at)
 
         # connection.locals.update({'session': event,
         #                         'active_id': active_action_id,
@@ -127,62 +230,62 @@ async def session(connection, event):
         # pprint(connector.ws.registered_uris)
 
 @connector.ws.register('/lol-game-queues/v1/queues', event_types=('UPDATE',))
+@coalescer.coalesce()
 async def queue(connection, event):
-    # print(type(event))
-
-    # helping variables
-    content: str = str()
-    header: str = colored('The queue has been updated.', 'red')
-    data: dict = {
-        'type of the queue': event.data['type'],
-        'name of the queue': event.data['name'],
-    }
-
-    # fulfill content variable
-    for key, value in data.items():
-        content += colored(f"\t-{key}: ", 'red')
-        content += colored(f"{value}", 'red', attrs=('bold',))
-        content += '\n'
-
-    # print out data
-    print(header)
-    print(content)
-
-    # ADD EVENT OBJECT TO CONNECTION'S LOCALS IN OREDER TO GAIN OUTER ACCESS
-    connection.locals.update({'queue': event})
+    logger.debug('The queue has been updated.\n'
+                 '\t-type of the queue: %s\n'
+                 '\t-name of the queue: %s',
+                 event.data['type'], event.data['name'])
+
+    store.put(event.uri, event.type, event.data, event.received_at)
     # pprint(connector.ws.registered_uris)
 
 @connector.ws.register('/lol-matchmaking/v1/search', event_types=('UPDATE',
                                                                   'DELETE'))
+@coalescer.coalesce(key=search_phase)
 async def search(connection, event):
-    # print(type(event))
-
-    # helping variables
-    content: str = str()
-    header: str = colored('The search has been updated.', 'red')
-
     if event.data:
-        data: dict = {
-            'est queue time': event.data['estimatedQueueTime'],
-            'is currently in queue': event.data['isCurrentlyInQueue'],
-            'lobby id': event.data['lobbyId'],
-            'search state': event.data['searchState'],
-            'time in queue': event.data['timeInQueue'],
-        }
-
-        # fulfill content variable
-        for key, value in data.items():
-            content += colored(f"\t-{key}: ", 'red')
-            content += colored(f"{value}", 'red', attrs=('bold',))
-            content += '\n'
-
-        # print out data
-        print(header)
-        print(content)
+        logger.debug('The search has been updated.\n'
+                     '\t-est queue time: %s\n'
+                     '\t-is currently in queue: %s\n'
+                     '\t-lobby id: %s\n'
+                     '\t-search state: %s\n'
+                     '\t-time in queue: %s',
+                     event.data['estimatedQueueTime'],
+                     event.data['isCurrentlyInQueue'],
+                     event.data['lobbyId'],
+                     event.data['searchState'],
+                     event.data['timeInQueue'])
     
     else:
         event.data = None
 
-    # ADD EVENT OBJECT TO CONNECTION'S LOCALS IN OREDER TO GAIN OUTER ACCESS
-    connection.locals.update({'search': event})
-    # pprint(connector.ws.registered_uris)
\ No newline at end of file
+    store.put(event.uri, event.type, event.data, event.received_at)
+    # pprint(connector.ws.registered_uris)
+
+@connector.ws.register('/lol-matchmaking/v1/ready-check',
+                       event_types=('UPDATE', 'DELETE'))
+@coalescer.coalesce(key=ready_check_phase)
+async def ready_check(connection, event):
+    # a new state or response is never delayed by the coalescer, the
+    # ReadyCheckState accepts as soon as it is woken up
+    if event.data:
+        logger.debug('The ready check has been updated.\n'
+                     '\t-state: %s\n'
+                     '\t-player response: %s\n'
+                     '\t-decliner ids: %s',
+                     event.data['state'],
+                     event.data['playerResponse'],
+                     event.data['declinerIds'])
+
+    store.put(event.uri, event.type, event.data or None, event.received_at)
+
+@connector.ws.register('/lol-gameflow/v1/gameflow-phase',
+                       event_types=('UPDATE',))
+@coalescer.coalesce(key=lambda event: (event.type, event.data))
+async def gameflow(connection, event):
+    store.put(event.uri, event.type, event.data, event.received_at)
+
+    # the phase drives Launcher's state transitions
+    if Command.state:
+        Command.state.phase_tracker.update(event.data)
@@ -2,38 +2,131 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from sys import argv
 from typing import Match, Dict
-from time import sleep
+import concurrent.futures
 from command import *
-import json
 import os
 import events
 from packages.champNameIdMapper import ChampNameIdMapper
+from packages.logger import get_logger
+from packages import json_codec
 from rune_maker import send_most_optimal_runes_for
+from session_manager import TurnPrediction
 from summoner_perks import send_user_defined_summoner_spells
 
+logger = get_logger('launcher')
+
+
+def _priority_champion_ids(filename: str, key: str) -> list:
+    '''Ids of the champions listed (by name, in any case) under the key
+    of the picks and bans priority file.'''
+
+    with open(filename, "rb") as priority_data:
+        names: list = json_codec.load(priority_data)[key]
+
+    champs = ChampNameIdMapper.get_champion_dict(order='normal')
+    ids_by_name: dict = {name.lower(): int(champ_id)
+                         for name, champ_id in champs.items()}
+
+    return [ids_by_name[name.lower()] for name in names
+            if name.lower() in ids_by_name]
+
 
 class Launcher:
     _state = None
     _user_accounts: Dict[str, str] = {}
 
+    # websocket handlers wake the launcher up, this is only a fallback
+    # in case an event has been missed
+    SAFETY_POLL_INTERVAL: float = 3.0
+
+    # attached in every state, GameflowPhaseTracker depends on it
+    GAMEFLOW_URI: str = '/lol-gameflow/v1/gameflow-phase'
+
     def __init__(self, arg_state: State) -> None:
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self.phase_tracker: GameflowPhaseTracker = GameflowPhaseTracker(self)
         self.change_state(arg_state)
 
     def change_state(self, arg_state: State) -> None:
         self._state = arg_state
         self._state.set_context(self)
+
+        # listen only to the uris the new state is interested in and
+        # scan it right away
+        self.update_subscriptions()
+        Command.notifier.unsubscribe(self._wakeup)
+        Command.notifier.subscribe(self._state.watched_uris, self._wakeup)
+        self._wakeup.set()
+
         events.post_event(self._state.event_type, data=self._user_accounts)
 
-    def next(self) -> None:
-        self._state.next()
+    def update_subscriptions(self) -> None:
+        '''Attach websocket handlers the current state needs. While the
+        launcher is not initialized the user drives the client manually
+        (console, buttons), so every handler stays attached.'''
+
+        if LobbyState.initialized:
+            Command.subscriptions.activate((self.GAMEFLOW_URI,
+                                            *self._state.watched_uris))
+
+        else:
+            Command.subscriptions.activate()
+
+    def suspend(self) -> None:
+        '''Called when the client has been closed. The state is kept, the
+        gameflow phase of the next client decides whether it is still
+        valid.'''
+
+        self.phase_tracker.phase = None
+
+    def resume(self) -> None:
+        '''Called when the user is logged in to a (re)started client.
+
+        The session of the closed client has been dropped, states which
+        need it are skipped by the tracker (see State.can_enter) until
+        the websocket of the new client primes it again.'''
+
+        self.update_subscriptions()
+        self.phase_tracker.apply()
+        self._wakeup.set()
+
+    def next(self) -> concurrent.futures.Future:
+        '''Perform the action of the current state, can be called from
+        any thread.'''
+
+        return asyncio.run_coroutine_threadsafe(self._state.next(),
+                                                Command._loop)
 
     def cancel(self) -> None:
         self._state.cancel()
     
     async def _scan_for_state_change(self) -> None:
+        await ChampNameIdMapper.wait_for_data()
+
         while True:
-            await asyncio.sleep(.2)
-            await self._state._scan()
+            # do not scan stale data while the client is gone
+            if not Command.lifecycle.is_logged_in():
+                await Command.lifecycle.wait_logged_in()
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(),
+                                       self.SAFETY_POLL_INTERVAL)
+
+            except asyncio.TimeoutError:
+                pass
+
+            # clear before scanning, so changes which arrive during
+            # the scan will trigger another one
+            self._wakeup.clear()
+
+            # a failing state must not stop the launcher, the next
+            # wakeup (or the tracker) gets it going again
+            try:
+                await self._state._scan()
+
+            except Exception:
+                logger.exception('scan of %s has failed',
+                                 type(self._state).__name__)
             # if conn.locals['seesion'].data['specyfic_value'] == 'mid':
             #     pass
 
@@ -42,6 +135,13 @@ class Launcher:
 
 
 class State(ABC):
+    # websocket uris whose handlers are attached in this state and whose
+    # changes trigger _scan
+    watched_uris: tuple = ()
+
+    # the state acts on the champion select of Command.session_manager
+    requires_session: bool = False
+
     def __init__(self) -> None:
         self._command: Command = None
         self._context: Launcher = None
@@ -49,6 +149,14 @@ class State(ABC):
         self.allowed_to_change_state: bool = False
         self.event_type = "None"
 
+    @classmethod
+    def can_enter(cls) -> bool:
+        '''Whether the data the state acts on is there. The session is
+        dropped when the champion select ends or the client is closed.'''
+
+        return not cls.requires_session \
+            or Command.session_manager.get_snapshot() is not None
+
     def get_context(self) -> Launcher:
         return self._context
     
@@ -59,13 +167,26 @@ class State(ABC):
         self._command = arg_command
     
     def _execute_command(self):
-        self._command.execute()
+        return self._command.execute()
+
+    async def _run_command(self) -> CommandResult:
+        '''Execute the command and wait for the result, so the state can
+        change only once the client has confirmed the action.'''
+
+        return await self._command.run()
+
+    def _is_current(self) -> bool:
+        '''Whether the launcher is still in this state. It may have been
+        switched (e.g. by GameflowPhaseTracker) while a command was in
+        flight, then the state must not act on its result.'''
+
+        return self._context._state is self
     
     def _get_json(self):
         pass
 
     @abstractmethod
-    def next(self) -> None:
+    async def next(self) -> None:
         '''Depending on state it can be: findmatch/accept/ban/pick/
         perform hover command'''
         pass
@@ -91,30 +212,24 @@ class State(ABC):
 
 class LobbyState(State):
     initialized : bool = False
+    watched_uris: tuple = ('/lol-lobby/v2/lobby',
+                           '/lol-matchmaking/v1/search',
+                           '/lol-game-queues/v1/queues')
 
     def __init__(self) -> None:
         super().__init__()
         self.lobby_getter_cmd : Command = None
         Command.actual_state = LobbyState
         
-    def next(self) -> None:
+    async def next(self) -> None:
         self._set_command(MatchFinder())
 
-        # try:
-        self._execute_command()
-        
-        # except Exception as e:
-        #     print(Command.ERR_S,
-        #           'exception during executing "next" command in LobbyState')
-        #     print(e)
-        
-        # else:
-        self._context.change_state(ReadyCheckState())
+        # the search is started again on the next scan if it has failed
+        if (await self._run_command()).ok and self._is_current():
+            self._context.change_state(ReadyCheckState())
 
     def cancel(self) -> None:
-        print(Command.ERR_S,
-              'For this state "cancel" does not make sense.',
-               sep=' ')
+        logger.error('For this state "cancel" does not make sense.')
     
     async def _scan(self) -> None:
         if not self.lobby_getter_cmd:
@@ -130,29 +245,33 @@ class LobbyState(State):
 
         # print(LobbyState.initialized)
         if LobbyState.initialized and lobby and can_start:
-            self.next()
+            await self.next()
         
 
 class ReadyCheckState(State):
-    verbose : bool = True
+    '''In the queue, waiting for a ready check. The ready check is
+    accepted as soon as its websocket event wakes the launcher up.
+
+    If somebody else declines, the client goes back to the queue and the
+    state waits for the next ready check. If the user declines (e.g. by
+    hand in the client) the launcher stops.'''
+
+    watched_uris: tuple = ('/lol-matchmaking/v1/ready-check',)
 
     def __init__(self) -> None:
         super().__init__()
-        self.search_getter_cmd : Command = None
+        self.ready_check_getter_cmd: Command = None
 
-    def next(self) -> None:
-        self._set_command(Acceptor())
+        # time.monotonic() the current ready check has been received at,
+        # None until there is one in progress
+        self._found_at: float = None
+        self._accepted: bool = False
 
-        try:
-            self._execute_command()
-        
-        except Exception as e:
-            print('exception during executing "next" command in ReadyCheckState')
-            print(e)
-        
-        else:
-            # tutaj jakies zabezpieczenie jesli gra zostanie zdeclie'owana przez kogos
-            self._context.change_state(DeclarePositionState())
+    async def next(self) -> None:
+        self._set_command(Acceptor(found_at=self._found_at))
+
+        # if it has failed, the next update of the ready check tries again
+        self._accepted = (await self._run_command()).ok
 
     def cancel(self) -> None:
         self._set_command(Canceller())
@@ -161,96 +280,100 @@ class ReadyCheckState(State):
             self._execute_command()
 
         except Exception as e:
-            print('exception during executing "cancel" command in ReadyCheckState')
-            print(e)
+            logger.error('exception during executing "cancel" command in '
+                         'ReadyCheckState: %s', e)
         
         else:
             self._context.change_state(LobbyState())
     
     async def _scan(self) -> None:
+        if not self.ready_check_getter_cmd:
+            self.ready_check_getter_cmd = ReadyCheckGetter()
 
-        if not self.search_getter_cmd:
-            self.search_getter_cmd = SearchGetter()
-
-        # if not self.lobby_getter_cmd:
-        #     self.lobby_getter_cmd = LobbyGetter()
-
-        # run coroutine threadsafe here????????
-        await self.search_getter_cmd._execute()
-        search = self.search_getter_cmd.get_data()
-        deleted = self.search_getter_cmd.get_type() == 'Delete'
-
-        if search and not deleted:
-            print(Command.INFO_S, 'searching...') if self.verbose else None
-
-            # is_in_progress = search['readyCheck']['state'] == 'InProgress'
-            is_found = search['searchState'] == 'Found'
-
-            if is_found:
-                print(Command.INFO_S, 'game is found') if self.verbose else None
-                await asyncio.sleep(3)
-
-                self_declined = search['readyCheck']['playerResponse'] == 'Declined'
-                decliner_ids = search['readyCheck']['declinerIds']
-                print('     >decliner ids: ', decliner_ids)
-                
-                if not self_declined:
-                    print(Command.INFO_S, 'transition to next state') if self.verbose else None
-                    self.next()
-                
-                else:
-                    print(Command.INFO_S, 'self declination detected') if self.verbose else None
-                    LobbyState.initialized = False
-                    self._context.change_state(LobbyState())
-            
-        else:
+        await self.ready_check_getter_cmd._execute()
+
+        # nothing new since the last scan
+        if not self.ready_check_getter_cmd.changed:
+            return
+
+        ready_check = self.ready_check_getter_cmd.get_data()
+
+        if not ready_check or ready_check['state'] == 'Invalid':
+            logger.debug('searching...')
+            self._found_at = None
+            self._accepted = False
+            return
+
+        state: str = ready_check['state']
+        response: str = ready_check['playerResponse']
+
+        if response == 'Declined':
+            logger.info('self declination detected')
+            LobbyState.initialized = False
             self._context.change_state(LobbyState())
 
+        elif state == 'InProgress':
+            if self._found_at is None:
+                logger.info('game is found')
+                self._found_at = \
+                    self.ready_check_getter_cmd._get_return().received_at
+
+            if response == 'None' and not self._accepted:
+                await self.next()
+
+        elif state == 'EveryoneReady':
+            logger.info('transition to next state')
+            self._context.change_state(DeclarePositionState())
+
+        elif state in ('StrangerNotReady', 'PartyNotReady'):
+            logger.info('the game has been declined by: %s, back in the '
+                        'queue', ready_check['declinerIds'])
+            self._found_at = None
+            self._accepted = False
+
+        # leaving the queue is detected by GameflowPhaseTracker
+
 
 class DeclarePositionState(State):
-    verbose : bool = True
+    watched_uris: tuple = ('/lol-champ-select/v1/session',)
 
     def __init__(self) -> None:
         super().__init__()
         self.session_getter_cmd: Command = None
-        self.search_getter_cmd: Command = None
         self.event_type = "game_found"
 
-    def next(self) -> None:
-        print(Command.INFO_S, 'Switching to the next state: BanningState.')
+    async def next(self) -> None:
+        logger.info('Switching to the next state: BanningState.')
         self._context.change_state(BanningState())
     
     def cancel(self) -> None:
         pass
     
     async def _scan(self) -> None:
-        print(Command.INFO_S, 'Scanning in DeclarePositionState...')
-
-        if not self.search_getter_cmd:
-            self.search_getter_cmd = SearchGetter()
+        logger.debug('Scanning in DeclarePositionState...')
 
+        # dodges (going back to the queue) are detected by
+        # GameflowPhaseTracker
         if not self.session_getter_cmd:
             self.session_getter_cmd = SessionGetter()
 
-        await self.search_getter_cmd._execute()
-        search = self.search_getter_cmd.get_data()
-        print(f"    >search: {search}")
-
-        if search:
-            print("search contains a data, backing to ReadyCheckState.")
-            self._context.change_state(ReadyCheckState())
-        
         await self.session_getter_cmd._execute()
+
+        # nothing new since the last scan
+        if not self.session_getter_cmd.changed:
+            return
+
         session = self.session_getter_cmd.get_data()
         # print(f"    >session: {session}")
 
         if session:
             if session["timer"]["phase"] == "BAN_PICK":
-                self.next()
+                await self.next()
             
 
 class BanningState(State):
-    verbose: bool = True
+    watched_uris: tuple = ('/lol-champ-select/v1/session',)
+    requires_session: bool = True
 
     BASE: str = os.path.join(os.path.dirname(__file__), '..', 'data')
     FILENAME: str = os.path.join(os.path.normpath(os.path.join(BASE)),
@@ -258,56 +381,80 @@ class BanningState(State):
 
     event_type = "champion_ban"
 
-    def next(self) -> None:
-        champ_to_ban = self._choose_first_available_ban()
-        self._set_command(Hover(champ_to_ban))
-        self._execute_command()
+    def __init__(self) -> None:
+        super().__init__()
+        self._ban_queue: list = None
 
-        self._set_command(Complete())
-        try:
-            self._execute_command()
-            print('right after executing command - Complete()')
-        except Exception as e:
-            print('execption while executing Complete in BanningState.')
-            print(e)
+        # resolved before my turn starts, see _prepare
+        self._champion: int = None
+        self._hover: Hover = None
 
+    async def next(self) -> None:
+        self._prepare()
+        if self._hover:
+            self._set_command(self._hover)
+            if not (await self._run_command()).ok or not self._is_current():
+                return
 
-        # await Hover('Zed')._execute()
-        # await Complete()._execute()
+        # if the ban has failed, the next scan tries again
+        self._set_command(Complete())
+        if not (await self._run_command()).ok or not self._is_current():
+            return
 
-        print(Command.INFO_S, 'transition to PickingState.')
+        logger.info('transition to PickingState.')
         self._context.change_state(PickingState())
     
     def cancel(self) -> None:
         pass
 
     async def _scan(self) -> None:
-        print(Command.INFO_S,
-              'Scanning in banning state...') if self.verbose else None
+        logger.debug('Scanning in banning state...')
 
         my_action: Action = Command.session_manager.get_my_action()
 
-        if my_action.type == 'ban':
-            print(Command.INFO_S, 'banning phase detected executing next.')\
-                if self.verbose else None
+        if my_action and my_action.type == 'ban':
+            logger.info('banning phase detected executing next.')
+
+            await self.next()
+            return
+
+        prediction: TurnPrediction = Command.session_manager.predict_my_turn()
+
+        if prediction and prediction.action.type != 'ban':
+            logger.info('no ban left for me, transition to PickingState.')
+            self._context.change_state(PickingState())
+
+        elif prediction:
+            # the turn opens soon, so the champion and the request are
+            # ready before it does
+            self._prepare()
+            logger.debug('my ban is %s turn(s) away, starts in %s s at the '
+                         'latest, %s is ready to be banned',
+                         prediction.turns_away, prediction.starts_in,
+                         self._champion)
 
-            self.next()
-        
         else:
-            print(Command.INFO_S, 'banning phase not detected.')\
-                if self.verbose else None
+            logger.debug('banning phase not detected.')
+
+    def _prepare(self) -> None:
+        '''Choose the champion to ban and create the hover command, again
+        only if the chosen champion is not available anymore.'''
+
+        if self._champion and Command.session_manager.is_available(self._champion):
+            return
+
+        self._champion = self._choose_first_available_ban()
+        self._hover = Hover(self._champion) if self._champion else None
     
     def _choose_first_available_ban(self) -> int:
-        with open(self.FILENAME, "r") as pick_priority_data:
-            ban_queue = json.load(pick_priority_data)["bans"]
+        if self._ban_queue is None:
+            self._ban_queue = _priority_champion_ids(self.FILENAME, 'bans')
 
-            champs = ChampNameIdMapper.get_champion_dict(order='normal')
-            ban_queue: list[int] = [int(champs[ban]) for ban in ban_queue]
-            
-            return ban_queue[0]
+        return Command.session_manager.first_available(self._ban_queue)
 
 class PickingState(State):
-    verbose: bool = True
+    watched_uris: tuple = ('/lol-champ-select/v1/session',)
+    requires_session: bool = True
     
     BASE: str = os.path.join(os.path.dirname(__file__), '..', 'data')
     FILENAME: str = os.path.join(os.path.normpath(os.path.join(BASE)),
@@ -315,15 +462,27 @@ class PickingState(State):
 
     event_type = "champion_pick"
 
-    def next(self) -> None:
-        champ_to_pick = self._choose_first_available_pick()
-        self._set_command(Hover(champ_to_pick))
-        self._execute_command()
-        sleep(1)
+    def __init__(self) -> None:
+        super().__init__()
+        self._pick_queue: list = None
+
+        # resolved before my turn starts, see _prepare
+        self._champion: int = None
+        self._hover: Hover = None
+
+    async def next(self) -> None:
+        self._prepare()
+
+        # the pick is completed once the client has confirmed the hover,
+        # if either fails the next scan tries again
+        if self._hover:
+            self._set_command(self._hover)
+            if not (await self._run_command()).ok or not self._is_current():
+                return
+
         self._set_command(Complete())
-        self._execute_command()
-        # await Hover('TwistedFate')._execute()
-        # await Complete()._execute()
+        if not (await self._run_command()).ok or not self._is_current():
+            return
 
         self._context.change_state(PreGameState())
     
@@ -332,7 +491,7 @@ class PickingState(State):
 
     async def _scan(self) -> None:
         # print(Command.INFO_S, 'Scanning in picking state...')
-        print(Command.INFO_S, 'Scanning in PickingState...')
+        logger.debug('Scanning in PickingState...')
 
         # 1. try to comment everything
         # 2. breakpoint on my_aciton = Command.session_manager...
@@ -344,71 +503,143 @@ class PickingState(State):
 
         if my_action:
             if my_action.type == 'pick':
-                print(Command.INFO_S, 'picking phase detected executing next.')
+                logger.info('picking phase detected executing next.')
 
-                self.next()
+                await self.next()
             
             else:
-                print(Command.INFO_S, 'picking phase not detected.')
-    
-    def _choose_first_available_pick(self) -> str:
-
-        with open(self.FILENAME, "r") as pick_priority_data:
-            pick_queue = json.load(pick_priority_data)["picks"]
+                logger.debug('picking phase not detected.')
 
-            champs = ChampNameIdMapper.get_champion_dict(order='normal')
-            pick_queue_id: list[int] = []
-            # [int(champs[pick]) for pick in pick_queue]
+            return
 
-            for pick in pick_queue:
-                # TODO: Allow a programmer read this line of code without
-                # need of buying second screen
-                formatted_key = list(filter(lambda name: name.lower() == pick.lower(), champs.keys()))[0]
-                pick_queue_id.append(int(champs[formatted_key]))
+        prediction: TurnPrediction = Command.session_manager.predict_my_turn()
 
-        actions: list[Action] = \
-        Command.session_manager.get_actions_with_unavailable_champions()
+        if prediction and prediction.action.type == 'pick':
+            # the turn opens soon, so the champion and the request are
+            # ready before it does
+            self._prepare()
+            logger.debug('my pick is %s turn(s) away, starts in %s s at the '
+                         'latest, %s is ready to be picked',
+                         prediction.turns_away, prediction.starts_in,
+                         self._champion)
 
-        unavailable_champions: list[int] = [c.champion_id for c in actions]
+    def _prepare(self) -> None:
+        '''Choose the champion to pick and create the hover command, again
+        only if the chosen champion is not available anymore.'''
 
-        for pick in pick_queue_id:
-            if pick not in unavailable_champions:
-                return pick
-        # with open(self.FILENAME, "r") as pick_priority_data:
-        #     pick_queue = json.load(pick_priority_data)["picks"]
+        if self._champion and Command.session_manager.is_available(self._champion):
+            return
 
-        #     champs = ChampNameIdMapper.get_champion_dict(order='normal')
-        #     pick_queue: list[int] = [int(champs[pick]) for pick in pick_queue]
-            
-        
-        # actions: list[Action] = \
-        # Command.session_manager.get_actions_with_unavailable_champions()
-
-        # unavailable_champions: list[int] = [c.champion_id for c in actions]
+        self._champion = self._choose_first_available_pick()
+        self._hover = Hover(self._champion) if self._champion else None
+    
+    def _choose_first_available_pick(self) -> int:
+        if self._pick_queue is None:
+            self._pick_queue = _priority_champion_ids(self.FILENAME, 'picks')
 
-        # for pick in pick_queue:
-        #     if pick not in unavailable_champions:
-        #         return pick
+        return Command.session_manager.first_available(self._pick_queue)
 
 
 class PreGameState(State):
+    watched_uris: tuple = ('/lol-gameflow/v1/gameflow-phase',)
 
     event_type = "game_start"
 
-    def next(self) -> None:
-        champion_id: int = Command.session_manager.get_me_as_teammember().champion_id
+    def __init__(self) -> None:
+        super().__init__()
+
+        # the session is dropped once its handler is detached in this
+        # state, so the picked champion is taken while it is still there
+        me: TeamMember = Command.session_manager.get_me_as_teammember()
+        self._champion_id: int = me.champion_id if me else None
+
+    async def next(self) -> None:
+        # nothing has been picked (e.g. the champion select has been
+        # left), there is nothing to prepare the game for
+        if not self._champion_id:
+            logger.info('no champion picked, nothing to send before the game')
+            self._context.change_state(LobbyState())
+            return
+
+        champion_id: int = self._champion_id
         champs: dict = ChampNameIdMapper.get_champion_dict(order='reversed')
         champion: str = champs[str(champion_id)]
 
         send_user_defined_summoner_spells()
-        send_most_optimal_runes_for(champion)
+        await send_most_optimal_runes_for(champion)
 
-        self._context.change_state(LobbyState())
+        if self._is_current():
+            self._context.change_state(LobbyState())
         
     def cancel(self) -> None:
         pass
 
     async def _scan(self) -> None:
-        print(" >>>>>>>>>>>>UR IN PRE GAME STATE<<<<<<<<<<<<<< ")
+        logger.info('entered PreGameState')
         await asyncio.sleep(3)
-        self.next()
+
+        if self._is_current():
+            await self.next()
+
+
+class GameflowPhaseTracker:
+    '''Single authority on where the client is. The gameflow phase
+    (/lol-gameflow/v1/gameflow-phase) tells which group of states the
+    launcher is allowed to be in, so instead of inferring it from lobby,
+    search and session data every transition (including dodges) is a dict
+    lookup on a short string.
+
+    Transitions inside a group (e.g. from BanningState to PickingState)
+    are still made by the states themselves.'''
+
+    PHASES: Dict[str, tuple] = {
+        'None': (LobbyState,),
+        'Lobby': (LobbyState,),
+        'Matchmaking': (ReadyCheckState,),
+        'ReadyCheck': (ReadyCheckState,),
+        'ChampSelect': (DeclarePositionState, BanningState, PickingState,
+                        PreGameState),
+        # PreGameState is entered only from PickingState, once the game
+        # has started the champion select it needs is gone
+        'GameStart': (LobbyState, PreGameState),
+        'InProgress': (LobbyState, PreGameState),
+        'Reconnect': (LobbyState, PreGameState),
+        'WaitingForStats': (LobbyState,),
+        'PreEndOfGame': (LobbyState,),
+        'EndOfGame': (LobbyState,),
+    }
+
+    def __init__(self, arg_context: Launcher) -> None:
+        self._context: Launcher = arg_context
+        self.phase: str = None
+
+    def update(self, phase: str) -> None:
+        '''Called by the gameflow-phase websocket handler.'''
+
+        if phase == self.phase:
+            return
+
+        self.phase = phase
+        self.apply()
+
+    def apply(self) -> None:
+        '''Switch to the first state of the phase's group which can be
+        entered if the current state does not belong to the group or its
+        data is missing (e.g. the client has been restarted in the
+        champion select). The launcher follows the client only while it
+        is initialized.'''
+
+        if not LobbyState.initialized:
+            return
+
+        allowed: tuple = self.PHASES.get(self.phase)
+        state: State = self._context._state
+
+        if not allowed or (isinstance(state, allowed) and state.can_enter()):
+            return
+
+        # the first state of every group needs no session
+        target: type = next(cls for cls in allowed if cls.can_enter())
+        logger.info('gameflow phase %s, switching to %s',
+                    self.phase, target.__name__)
+        self._context.change_state(target())
@@ -1,5 +1,4 @@
 # kivy packages:
-import json
 from os import sep
 from sys import argv
 import kivy
@@ -22,6 +21,7 @@ from kivy.uix.gridlayout import GridLayout
 # my packages:
 from packages.theme import KivyTheme
 from packages.utils import LOLClientStatusInformer, path_problem_solver
+from packages import json_codec
 
 from champion_select import ChampionSelectUI, ChampionSelect, ChampionSelectInterface
 from summoner_perks import SummonerPerksSlotUI
@@ -40,6 +40,11 @@ from launcher import Launcher, LobbyState
 
 # import connector instance and websockets
 from connector import connector
+from packages.logger import setup_logging, shutdown_logging
+
+# log level and quiet mode can be set with LOL_AFK_BUDDY_LOG_LEVEL and
+# LOL_AFK_BUDDY_QUIET environment variables
+setup_logging()
 
 # setup event handlers
 events.setup_email_event_handlers()
@@ -147,11 +152,18 @@ class LauncherButton(MyButton):
     
     def execute_command(self) -> None:
         try:
-            self.command.execute()
+            self.command.execute(callback=self._report)
 
         except Exception as e:
             print(Command.ERR_S, e, sep=' ')
 
+    @staticmethod
+    def _report(result: CommandResult) -> None:
+        # called on the connector's thread, only printing is safe here
+        if not result.ok:
+            print(Command.ERR_S, f'{result.command} has failed',
+                  f'(status: {result.status}, error: {result.error!r})', sep=' ')
+
     def on_press(self):
 
         # this method is replaced inside kivy file by one of the
@@ -316,16 +328,13 @@ class MenuApp(App, KivyTheme):
 
         # update the user accounts' save file
         save_file_path = path_problem_solver("config") + "\\" + "user_info.json"
-        with open(save_file_path, "r") as read_file:
-            accounts = json.load(read_file)
+        accounts = json_codec.load_file(save_file_path)
         accounts.update(data)
-        with open(save_file_path, "w") as write_file:
-            json.dump(accounts, write_file)
+        json_codec.dump_file(accounts, save_file_path)
 
     def _load_user_accounts(self) -> Dict[str, str]:
         save_file_path = path_problem_solver("config") + "\\" + "user_info.json"
-        with open(save_file_path, "r") as read_file:
-            accounts = json.load(read_file)
+        accounts = json_codec.load_file(save_file_path)
         # update values in python code
         self.update_user_accounts(data=accounts)
         # return for user_accounts field assigment in the menu.kv file
@@ -362,6 +371,9 @@ class MenuApp(App, KivyTheme):
         '''This methods does nothing. Use it carefully.'''
         pass
 
+    def on_stop(self):
+        shutdown_logging()
+
     def build(self):
         app = AppLayout()
         Clock.schedule_interval(self.update_lol_client_status_property, 2)
@@ -1,7 +1,8 @@
-import json
 import os
 from datetime import datetime as dtime
 
+from packages import json_codec
+
 
 class JSONSaver:
     counter = 0
@@ -12,9 +13,11 @@ class JSONSaver:
     
     def save(self, what,
              filename: str = None,
-             type: str = None) -> str:
+             type: str = None,
+             pretty: bool = False) -> str:
         '''This method create appropirate directory and files
-        then stores indicated json files to them.'''
+        then stores indicated json files to them. Files are compact unless
+        pretty is set.'''
 
         # Generate a name for the file if provided filename is empty
         if not filename:
@@ -30,8 +33,7 @@ class JSONSaver:
 
         # Save json to the file
         try:
-            with open(file_path, 'w') as file:
-                json.dump(what, file, indent=4)
+            json_codec.dump_file(what, file_path, pretty=pretty)
             
             print('[OK]', 'File saved', sep=' ')
 
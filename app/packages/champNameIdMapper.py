@@ -1,29 +1,48 @@
 import asyncio
 import collections
 import aiohttp
-import json
 from termcolor import colored
 from pprint import pprint
+from packages import json_codec
 
 class ChampNameIdMapper():
     champions_data: dict = None
     champ_ids: dict = None
+    # champ_ids reversed (id -> name), built once per data download
+    champ_names: dict = None
+
+    # set by connector.py, data is requested after the user logs in
+    lifecycle = None
+    data_loaded: asyncio.Event = asyncio.Event()
     reqs: str = \
         "http://ddragon.leagueoflegends.com/cdn/11.16.1/data/en_US/champion.json"
 
     @classmethod
     async def get_data(cls):
-
-        # Clear champ ids, because this funcion will be called when we want
-        # update data (we unlocking _updata_champion_dict function)
-        cls.champ_ids = None
-
         async with aiohttp.ClientSession() as session:
             async with session.get(cls.reqs) as resp:
-                cls.champions_data = await resp.json()
+                cls.champions_data = json_codec.loads(await resp.read())
+
+            if cls.champions_data:
+                # Clear champ ids, because this funcion will be called when
+                # we want update data, and map them right away, the session
+                # summary reads champ_names without asking for them
+                cls.champ_ids = None
+                cls._update_champion_dict()
+                cls.data_loaded.set()
         
             return resp.status
 
+    @classmethod
+    async def wait_for_data(cls):
+        '''Wait until the user is logged in and champions are mapped
+        instead of assuming the data is already there.'''
+
+        if cls.lifecycle:
+            await cls.lifecycle.wait_logged_in()
+
+        await cls.data_loaded.wait()
+
     @classmethod
     def _update_champion_dict(cls):
         if not cls.champ_ids:
@@ -31,6 +50,7 @@ class ChampNameIdMapper():
             cls.champ_ids = {_name: _id for _name, _dict
                         in x.items() for k, _id
                         in _dict.items() if k == 'key'}
+            cls.champ_names = {v: k for k, v in cls.champ_ids.items()}
     
     @classmethod
     def get_champion_dict(cls, order='normal'):
@@ -40,7 +60,7 @@ class ChampNameIdMapper():
             return cls.champ_ids
 
         elif order == 'reversed':
-            return {v: k for k, v in cls.champ_ids.items()}
+            return cls.champ_names
         
         else:
             raise Exception
@@ -56,17 +76,17 @@ class ChampNameIdMapper():
 
             return
 
-        with open('ChampNameIdMap.json', 'w') as file:
-            try:
-                json.dump(cls.champ_ids, file, indent=4)
-
-            except Exception as e:
-                print(colored('[error]', 'red'), 'Error while saving to file\n',
-                      e, sep=' ')
-                      
-            else:
-                print(colored('[OK]', 'green'), 'successfully saved to file',
-                      sep=' ')
+        try:
+            json_codec.dump_file(cls.champ_ids, 'ChampNameIdMap.json',
+                                 pretty=True)
+
+        except Exception as e:
+            print(colored('[error]', 'red'), 'Error while saving to file\n',
+                  e, sep=' ')
+
+        else:
+            print(colored('[OK]', 'green'), 'successfully saved to file',
+                  sep=' ')
 
 
 async def main():
@@ -0,0 +1,166 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Set
+
+from packages.logger import get_logger
+
+logger = get_logger('command_scheduler')
+
+
+class _PriorityStats:
+    '''Counters of a single priority class.'''
+
+    # waits kept for the average
+    SAMPLES: int = 100
+
+    def __init__(self) -> None:
+        self.submitted: int = 0
+        self.merged: int = 0
+        self.queued: int = 0
+        self.waits: deque = deque(maxlen=self.SAMPLES)
+        self.max_wait: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'submitted': self.submitted,
+            'merged': self.merged,
+            'queued': self.queued,
+            'avg_wait': sum(self.waits) / len(self.waits) if self.waits else None,
+            'max_wait': self.max_wait,
+        }
+
+
+class CommandScheduler:
+    '''Single owner of the requests sent to the LCU. Everything that
+    sends commands (the launcher states, the console, the buttons)
+    submits them here instead of running them on its own.
+
+    Jobs are started in the order of their priority (lower first) and
+    then of their submission, by at most `concurrency` workers, so
+    cosmetic commands (rune pages, skins) cannot flood the client. Jobs
+    of the `urgent` priority or lower (accept, lock in) are not queued at
+    all, they start right away even if every worker is busy with a slow
+    job.
+
+    A job submitted with a key which is already queued or running is not
+    run again, the caller gets the future of the job in flight. E.g. two
+    scans of the launcher which both want to complete the same action
+    send only one request.
+
+    The time between the submission and the start of a job is recorded
+    per priority, see get_stats().'''
+
+    CONCURRENCY: int = 2
+
+    def __init__(self, concurrency: int = None, urgent: int = 0) -> None:
+        self.concurrency: int = concurrency or self.CONCURRENCY
+        self.urgent: int = urgent
+
+        # created on the loop by the first submit()
+        self._queue: asyncio.PriorityQueue = None
+        self._workers: List[asyncio.Task] = []
+        # urgent jobs which are running
+        self._urgent: Set[asyncio.Task] = set()
+
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._order = itertools.count()
+        self._stats: Dict[Any, _PriorityStats] = {}
+
+    def submit(self, run: Callable[[], Awaitable], priority: int,
+               key: Hashable = None) -> asyncio.Future:
+        '''Schedule run() (a coroutine function), must be called on the
+        loop. Returns a future of what run() returns, the future of the
+        job in flight if key is given and such job exists.'''
+
+        stats = self._stats.setdefault(priority, _PriorityStats())
+        stats.submitted += 1
+
+        if key is not None and key in self._in_flight:
+            stats.merged += 1
+            return self._in_flight[key]
+
+        self._start()
+
+        future: asyncio.Future = asyncio.get_event_loop().create_future()
+        if key is not None:
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        if priority <= self.urgent:
+            stats.waits.append(0.0)
+            task = asyncio.ensure_future(self._run(run, future))
+            self._urgent.add(task)
+            task.add_done_callback(self._urgent.discard)
+            return future
+
+        stats.queued += 1
+        self._queue.put_nowait((priority, next(self._order), time.monotonic(),
+                                run, future))
+        return future
+
+    def _start(self) -> None:
+        if self._workers:
+            return
+
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.ensure_future(self._work())
+                         for _ in range(self.concurrency)]
+
+    async def _work(self) -> None:
+        while True:
+            priority, _, queued_at, run, future = await self._queue.get()
+
+            stats = self._stats[priority]
+            stats.queued -= 1
+            wait = time.monotonic() - queued_at
+            stats.waits.append(wait)
+            stats.max_wait = max(stats.max_wait, wait)
+
+            if not future.done():
+                await self._run(run, future)
+
+    @staticmethod
+    async def _run(run: Callable[[], Awaitable], future: asyncio.Future) -> None:
+        try:
+            result = await run()
+
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+        except Exception as e:
+            logger.exception('Scheduled job has failed.')
+            if not future.done():
+                future.set_exception(e)
+
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    def get_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def get_stats(self) -> Dict[str, dict]:
+        '''Counters and waits (in seconds) by the name of the priority.'''
+
+        return {getattr(priority, 'name', str(priority)): stats.as_dict()
+                for priority, stats in sorted(self._stats.items())}
+
+    def stop(self) -> None:
+        '''Cancel the workers and the jobs which have not finished.'''
+
+        for worker in [*self._workers, *self._urgent]:
+            worker.cancel()
+        self._workers = []
+        self._urgent = set()
+
+        for future in list(self._in_flight.values()):
+            future.cancel()
+
+        if self._queue:
+            while not self._queue.empty():
+                priority, _, _, _, future = self._queue.get_nowait()
+                self._stats[priority].queued -= 1
+                future.cancel()
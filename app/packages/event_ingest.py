@@ -0,0 +1,252 @@
+import asyncio
+import functools
+from collections import deque
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from packages.logger import get_logger
+
+logger = get_logger('event_ingest')
+
+
+class _UriChannel:
+    '''Coalescing state of a single websocket uri.'''
+
+    def __init__(self) -> None:
+        self.pending: tuple = None
+        self.flusher: asyncio.Task = None
+        self.last_key: Hashable = None
+        self.last_dispatch: float = float('-inf')
+
+        self.received: int = 0
+        self.dispatched: int = 0
+        self.coalesced: int = 0
+
+
+class EventCoalescer:
+    '''Ingestion stage between lcu_driver and the registered websocket
+    handlers. Events of the same uri which arrive within `window` seconds
+    are collapsed to the latest one, so a burst of UPDATE events (e.g.
+    session events which differ only by the timer) runs the handler once.
+
+    An event whose key differs from the key of the previously dispatched
+    event (e.g. another champion select phase) is never delayed.
+
+    Usage:
+        @connector.ws.register('/uri')
+        @coalescer.coalesce(key=lambda event: event.type)
+        async def handler(connection, event): ...
+    '''
+
+    def __init__(self, window: float = 0.1) -> None:
+        self.window: float = window
+        self._channels: Dict[str, _UriChannel] = {}
+
+    def coalesce(self, key: Optional[Callable] = None):
+        '''Decorator which wraps a websocket handler. key(event) should
+        return a hashable value describing the phase of the event, by
+        default the type of the event is used.'''
+
+        key = key or (lambda event: event.type)
+
+        def wrapper(handler):
+            @functools.wraps(handler)
+            async def ingest(connection, event):
+                await self._ingest(handler, key, connection, event)
+
+            return ingest
+
+        return wrapper
+
+    async def _ingest(self, handler, key, connection, event) -> None:
+        channel = self._channels.setdefault(event.uri, _UriChannel())
+        channel.received += 1
+        event_key = key(event)
+
+        # phase change - the newest event supersedes everything pending
+        if event_key != channel.last_key:
+            if channel.pending:
+                channel.pending = None
+                channel.coalesced += 1
+
+            if channel.flusher:
+                channel.flusher.cancel()
+                channel.flusher = None
+
+            await self._dispatch(channel, handler, connection, event, event_key)
+            return
+
+        since_last = asyncio.get_running_loop().time() - channel.last_dispatch
+
+        # nothing happened recently, no reason to wait
+        if not channel.pending and not channel.flusher \
+                and since_last >= self.window:
+            await self._dispatch(channel, handler, connection, event, event_key)
+            return
+
+        if channel.pending:
+            channel.coalesced += 1
+
+        channel.pending = (connection, event, event_key)
+
+        if not channel.flusher:
+            channel.flusher = asyncio.create_task(
+                self._flush_later(channel, handler,
+                                  max(self.window - since_last, 0)))
+
+    async def _flush_later(self, channel: _UriChannel, handler,
+                           delay: float) -> None:
+        await asyncio.sleep(delay)
+        channel.flusher = None
+
+        if channel.pending:
+            connection, event, event_key = channel.pending
+            channel.pending = None
+            await self._dispatch(channel, handler, connection, event, event_key)
+
+    async def _dispatch(self, channel: _UriChannel, handler, connection,
+                        event, event_key) -> None:
+        channel.last_key = event_key
+        channel.last_dispatch = asyncio.get_running_loop().time()
+        channel.dispatched += 1
+        await handler(connection, event)
+
+    def reset(self) -> None:
+        '''Drop pending events and forget the last keys, e.g. when the
+        connection they came from has been closed. Counters are kept.'''
+
+        for channel in self._channels.values():
+            if channel.flusher:
+                channel.flusher.cancel()
+                channel.flusher = None
+
+            channel.pending = None
+            channel.last_key = None
+            channel.last_dispatch = float('-inf')
+
+    def discard(self, uri: str) -> None:
+        '''Drop the pending event of the uri, e.g. when its handler has
+        been detached.'''
+
+        channel = self._channels.get(uri)
+        if channel is None:
+            return
+
+        if channel.flusher:
+            channel.flusher.cancel()
+            channel.flusher = None
+
+        channel.pending = None
+        channel.last_key = None
+
+    def get_coalesced(self, uri: str) -> int:
+        '''How many events of the uri have been dropped in favour of
+        a newer one.'''
+
+        channel = self._channels.get(uri)
+        return channel.coalesced if channel else 0
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        return {uri: {'received': channel.received,
+                      'dispatched': channel.dispatched,
+                      'coalesced': channel.coalesced}
+                for uri, channel in self._channels.items()}
+
+
+class _UriQueue:
+    '''Pending events of a single websocket uri and its consumer.'''
+
+    def __init__(self, maxsize: int) -> None:
+        # a full deque drops the oldest item on append
+        self.items: deque = deque(maxlen=maxsize)
+        self.ready: asyncio.Event = asyncio.Event()
+        self.consumer: asyncio.Task = None
+
+        self.received: int = 0
+        self.processed: int = 0
+        self.dropped: int = 0
+        self.max_depth: int = 0
+
+
+class EventQueue:
+    '''Bounded queue between the websocket reader and the handlers.
+
+    Every uri has its own queue of at most `maxsize` events and its own
+    consumer task, which runs consume(connection, event) for the events
+    in order. When the handlers can't keep up the oldest events of the
+    uri are dropped (every event carries the whole state of the uri, so
+    the latest one is enough), the reader never waits and a slow uri
+    (e.g. the champion select session) doesn't delay the others. The
+    consumers yield to other tasks between events, so commands like
+    accepting a ready check are not stuck behind a backlog.'''
+
+    def __init__(self, consume: Callable[..., Awaitable],
+                 maxsize: int = 8) -> None:
+        self.maxsize: int = maxsize
+        self._consume = consume
+        self._queues: Dict[str, _UriQueue] = {}
+
+    def put(self, connection, event) -> None:
+        '''Queue the event, must be called on the loop of the consumers.'''
+
+        queue = self._queues.get(event.uri)
+        if queue is None:
+            queue = self._queues[event.uri] = _UriQueue(self.maxsize)
+
+        queue.received += 1
+        if len(queue.items) == self.maxsize:
+            queue.dropped += 1
+
+        queue.items.append((connection, event))
+        queue.max_depth = max(queue.max_depth, len(queue.items))
+        queue.ready.set()
+
+        if queue.consumer is None or queue.consumer.done():
+            queue.consumer = asyncio.ensure_future(self._run_consumer(queue))
+
+    async def _run_consumer(self, queue: _UriQueue) -> None:
+        while True:
+            await queue.ready.wait()
+
+            while queue.items:
+                connection, event = queue.items.popleft()
+
+                try:
+                    await self._consume(connection, event)
+
+                except Exception:
+                    logger.exception('Handling of a %s event failed.',
+                                     event.uri)
+
+                queue.processed += 1
+
+                # let commands and the launcher run between the events
+                await asyncio.sleep(0)
+
+            queue.ready.clear()
+
+    def clear(self) -> None:
+        '''Drop the queued events, e.g. when their connection has been
+        closed. Counters are kept.'''
+
+        for queue in self._queues.values():
+            queue.items.clear()
+
+    def get_depth(self, uri: Optional[str] = None) -> int:
+        '''Number of queued events of the uri, or of all uris.'''
+
+        if uri is not None:
+            queue = self._queues.get(uri)
+            return len(queue.items) if queue else 0
+
+        return sum(len(queue.items) for queue in self._queues.values())
+
+    def get_dropped(self) -> int:
+        return sum(queue.dropped for queue in self._queues.values())
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        return {uri: {'depth': len(queue.items),
+                      'max_depth': queue.max_depth,
+                      'received': queue.received,
+                      'processed': queue.processed,
+                      'dropped': queue.dropped}
+                for uri, queue in self._queues.items()}
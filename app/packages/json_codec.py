@@ -0,0 +1,83 @@
+"""One place for encoding and decoding JSON in the project.
+
+orjson is used when it is installed, otherwise the standard library takes over, so
+the app works without it, just slower. Files are read and written as UTF-8 bytes,
+which is what orjson works with natively and saves a text decoding step.
+
+Output is compact by default, which is what machine-only files (LCU endpoint dumps,
+rune ids to send) need. Pass pretty=True for files meant to be read or edited by people,
+they are indented the same way by both backends.
+
+Attributes:
+    BACKEND (str): name of the library doing the work, 'orjson' or 'json'.
+    PRETTY_INDENT (int): indent of the pretty output, 2 is the only one orjson has.
+
+"""
+
+import json
+from json import JSONDecodeError  # orjson.JSONDecodeError subclasses it
+from typing import Any, IO, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson else 'json'
+PRETTY_INDENT = 2
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Decodes a JSON document."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any, pretty: bool = False) -> bytes:
+    """Encodes obj as UTF-8 JSON bytes."""
+    if orjson:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    if pretty:
+        return _dumps_pretty(obj).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _dumps_pretty(obj: Any) -> str:
+    """Pretty output of the standard library. Non-ASCII characters are left escaped, it is
+    ASCII only so encoding it costs nothing, while ensure_ascii=False slows the indenting
+    encoder down."""
+    return json.dumps(obj, indent=PRETTY_INDENT)
+
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """Encodes obj as a JSON string."""
+    if pretty and not orjson:
+        return _dumps_pretty(obj)
+    return dumps_bytes(obj, pretty).decode('utf-8')
+
+
+def load(file: IO) -> Any:
+    """Decodes a JSON document from an opened (text or binary) file."""
+    return loads(file.read())
+
+
+def load_file(path: str) -> Any:
+    """Decodes a JSON file."""
+    with open(path, 'rb') as file:
+        return loads(file.read())
+
+
+def dump_file(obj: Any, path: str, pretty: bool = False) -> None:
+    """Encodes obj to a JSON file, the file is overwritten."""
+    if pretty and not orjson:
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(_dumps_pretty(obj))
+        return
+
+    with open(path, 'wb') as file:
+        file.write(dumps_bytes(obj, pretty))
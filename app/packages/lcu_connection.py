@@ -0,0 +1,462 @@
+import asyncio
+import time
+from typing import Callable, Iterable, Optional
+
+import aiohttp
+from lcu_driver import Connector
+from lcu_driver.connection import Connection
+from lcu_driver.events.managers import WebsocketEventManager
+from lcu_driver.events.responses import WebsocketEventResponse
+from lcu_driver.utils import _return_ux_process
+
+from packages import json_codec
+from packages.event_ingest import EventQueue
+from packages.logger import get_logger
+
+logger = get_logger('lcu_connection')
+
+# WAMP message types used by the LCU websocket
+WAMP_SUBSCRIBE = 5
+WAMP_UNSUBSCRIBE = 6
+WAMP_EVENT = 8
+
+
+class ConnectionLifecycle:
+    '''Awaitable lifecycle of the LCU connection. Instead of checking
+    a flag in a loop, coroutines can await the moment the client API is
+    ready, the user is logged in or the client has been closed.
+
+    Events are set by the connector handlers (connector.py) on the
+    connector's loop and they should be awaited on the same loop.
+
+    The lifecycle outlives connections, when the client is restarted
+    the same events are set again for the new one.'''
+
+    def __init__(self) -> None:
+        self.connection: Connection = None
+
+        # how many times the client has been connected and for how long
+        # (in seconds) it was gone in between
+        self.sessions: int = 0
+        self.downtime: float = 0.0
+        self.last_downtime: float = None
+        self._lost_at: float = None
+
+        self.ready: asyncio.Event = asyncio.Event()
+        self.logged_in: asyncio.Event = asyncio.Event()
+        self.disconnected: asyncio.Event = asyncio.Event()
+
+        # there is no connection until the client is found
+        self.disconnected.set()
+
+    def is_ready(self) -> bool:
+        return self.ready.is_set()
+
+    def is_logged_in(self) -> bool:
+        return self.logged_in.is_set()
+
+    def set_ready(self, connection: Connection) -> None:
+        self.connection = connection
+        self.sessions += 1
+
+        if self._lost_at is not None:
+            self.last_downtime = time.monotonic() - self._lost_at
+            self.downtime += self.last_downtime
+            self._lost_at = None
+
+        self.disconnected.clear()
+        self.ready.set()
+
+    def set_logged_in(self) -> None:
+        self.logged_in.set()
+
+    def set_disconnected(self) -> None:
+        if self.connection is not None:
+            self._lost_at = time.monotonic()
+
+        self.connection = None
+        self.ready.clear()
+        self.logged_in.clear()
+        self.disconnected.set()
+
+    async def wait_ready(self) -> Connection:
+        '''Wait until the LCU API can be used and return the connection.'''
+
+        await self.ready.wait()
+        return self.connection
+
+    async def wait_logged_in(self) -> Connection:
+        '''Wait until the summoner is logged in and return the connection.'''
+
+        await self.logged_in.wait()
+        return self.connection
+
+    async def wait_disconnected(self) -> None:
+        await self.disconnected.wait()
+
+
+def uri_to_topic(uri: str) -> str:
+    '''/lol-champ-select/v1/session -> OnJsonApiEvent_lol-champ-select_v1_session'''
+
+    return 'OnJsonApiEvent' + uri.replace('/', '_')
+
+
+class PhaseScopedEventManager(WebsocketEventManager):
+    '''Websocket event manager whose handlers can be attached and detached
+    at runtime. Handlers are registered as usual with register(), but only
+    those whose uris have been activated are matched, and the websocket
+    is subscribed only to their topics, so the client does not even send
+    (and we do not decode) events nobody is interested in.
+
+    Until activate() is called with specific uris every registered
+    handler is active.
+
+    Matched events are not dispatched right away, they are put to
+    a bounded EventQueue whose per uri consumers run the handlers.
+
+    Functions registered with detached() are called with every uri whose
+    handlers activate() has detached, its state is not updated anymore.'''
+
+    # events of a single uri waiting for their handlers
+    QUEUE_SIZE: int = 8
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.queue: EventQueue = EventQueue(self._dispatch,
+                                            maxsize=self.QUEUE_SIZE)
+        self._active_uris: Optional[set] = None
+        self._active: list = self._registered_uris
+        self._topics: set = set()
+        self._connection: Connection = None
+        self._detach_handlers: list = []
+
+        # set once the bound websocket has been subscribed to the active
+        # topics and they have been primed
+        self.primed: asyncio.Event = asyncio.Event()
+        self._syncs: set = set()
+
+    @property
+    def registered_uris(self) -> list:
+        '''Handlers which are currently attached (used by match_event).'''
+
+        return self._active
+
+    @property
+    def all_uris(self) -> list:
+        '''Every registered handler, attached or not.'''
+
+        return self._registered_uris
+
+    def register(self, uri: str, **kwargs):
+        wrapper = super().register(uri, **kwargs)
+
+        def register_wrapper(coro_func):
+            coro_func = wrapper(coro_func)
+            self._update_active()
+            return coro_func
+
+        return register_wrapper
+
+    def detached(self, func: Callable[[str], None]):
+        '''Decorator which registers func(uri), called for every uri whose
+        handlers have been detached.'''
+
+        self._detach_handlers.append(func)
+        return func
+
+    def activate(self, uris: Optional[Iterable[str]] = None) -> None:
+        '''Attach handlers of the given uris and detach the rest. None
+        attaches every registered handler.'''
+
+        attached = {handler['uri'] for handler in self._active}
+        self._active_uris = None if uris is None else set(uris)
+        self._update_active()
+
+        # queued events of the detached uris are dropped by _dispatch,
+        # the rest of their state is dropped by the handlers
+        for uri in attached.difference(handler['uri']
+                                       for handler in self._active):
+            for func in self._detach_handlers:
+                func(uri)
+
+        if self._connection:
+            self._start_sync()
+
+    def _update_active(self) -> None:
+        if self._active_uris is None:
+            self._active = self._registered_uris
+
+        else:
+            self._active = [handler for handler in self._registered_uris
+                            if handler['uri'] in self._active_uris]
+
+    def bind(self, connection: Connection) -> None:
+        '''Subscribe to the active topics of a freshly opened websocket,
+        `primed` is set once it is done.'''
+
+        self._connection = connection
+        self._topics = set()
+        self._start_sync()
+
+    def unbind(self) -> None:
+        self._connection = None
+        self._topics = set()
+        self.primed.clear()
+
+    def _start_sync(self) -> None:
+        # the tasks are kept, so they are not collected while running and
+        # their errors are reported instead of being dropped
+        task = asyncio.ensure_future(self._sync_topics())
+        self._syncs.add(task)
+        task.add_done_callback(self._on_synced)
+
+    def _on_synced(self, task: asyncio.Task) -> None:
+        self._syncs.discard(task)
+
+        if not task.cancelled() and task.exception():
+            # e.g. the websocket has been closed meanwhile, the next one
+            # is subscribed from scratch
+            logger.warning('Syncing the websocket topics has failed: %r',
+                           task.exception())
+
+    async def _sync_topics(self) -> None:
+        connection = self._connection
+        if connection is None:
+            return
+        wanted = {uri_to_topic(handler['uri']): handler['uri']
+                  for handler in self._active}
+
+        # update the bookkeeping before awaiting anything, so consecutive
+        # activations compute their differences correctly
+        added = [topic for topic in wanted if topic not in self._topics]
+        removed = [topic for topic in self._topics if topic not in wanted]
+        self._topics = set(wanted)
+
+        for topic in removed:
+            await connection._ws.send_json([WAMP_UNSUBSCRIBE, topic])
+
+        for topic in added:
+            await connection._ws.send_json([WAMP_SUBSCRIBE, topic])
+
+        # events sent while we were not subscribed are lost, request the
+        # current state of newly attached uris
+        for topic in added:
+            await self.prime(connection, wanted[topic])
+
+        if connection is self._connection:
+            self.primed.set()
+
+    async def prime(self, connection: Connection, uri: str) -> None:
+        '''Run handlers of the uri with its current state requested
+        from the LCU, as if the websocket had just sent it.'''
+
+        res = await connection.request('get', uri)
+
+        if res.status == 200:
+            data = json_codec.loads(await res.read())
+            event = WebsocketEventResponse(event_type='Update', uri=uri,
+                                           data=data)
+
+        else:
+            event = WebsocketEventResponse(event_type='Delete', uri=uri,
+                                           data=None)
+
+        event.received_at = time.monotonic()
+
+        # queued after the events which are already waiting
+        self.queue.put(connection, event)
+
+    def match_event(self, connector, connection, data: dict) -> None:
+        '''Queue the event if a handler of its uri is attached.'''
+
+        uri = data['uri']
+
+        if any(self._matches(handler, uri) for handler in self._active):
+            event = WebsocketEventResponse(event_type=data['eventType'],
+                                           uri=uri, data=data['data'])
+
+            # the coalescing window and the queue come after, so latencies
+            # measured from the stamp include the whole ingestion
+            event.received_at = time.monotonic()
+            self.queue.put(connection, event)
+
+    @staticmethod
+    def _matches(handler: dict, uri: str) -> bool:
+        return handler['uri'] == uri or (handler['uri'].endswith('/')
+                                         and uri.startswith(handler['uri']))
+
+    async def _dispatch(self, connection: Connection,
+                        event: WebsocketEventResponse) -> None:
+        '''Run the handlers of the event one by one, called by the
+        consumer of the event's uri.'''
+
+        for handler in self._active:
+            if self._matches(handler, event.uri) \
+                    and event.type.upper() in handler['event_types']:
+                await handler['coroutine_or_callable'](connection, event)
+
+
+class PatientConnection(Connection):
+    '''lcu_driver's Connection which waits for the API with a backoff
+    instead of spinning on a refused socket while the client is booting.'''
+
+    API_READY_MIN_DELAY: float = 0.25
+    API_READY_MAX_DELAY: float = 2.0
+
+    def __init__(self, connector, process_or_string):
+        super().__init__(connector, process_or_string)
+        self._reconnect_requested: bool = False
+
+        # loop.time() of the last websocket frame
+        self.last_frame_at: float = None
+        self.ws_reconnects: int = 0
+
+    async def _wait_api_ready(self) -> None:
+        delay = self.API_READY_MIN_DELAY
+
+        while True:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    reqs = f'{self.address}/riotclient/region-locale'
+                    async with session.get(reqs, ssl=False):
+                        return
+
+            except aiohttp.ClientConnectorError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.API_READY_MAX_DELAY)
+
+    async def run_ws(self):
+        '''Same as lcu_driver's run_ws, but the subscriptions are managed
+        per topic by PhaseScopedEventManager instead of subscribing to
+        every event of the client.
+
+        The websocket is reopened (and the topics resubscribed) when
+        reconnect_ws() has been requested or when it was closed while the
+        client API still responds. Otherwise the connection ends.'''
+
+        # 8MB
+        MAX_WS_MSG_SIZE = 8 * 1024 * 1024
+
+        local_session = aiohttp.ClientSession(
+            auth=aiohttp.BasicAuth('riot', self._auth_key),
+            headers={'Content-Type': 'application/json',
+                     'Accept': 'application/json'})
+
+        ws_manager: PhaseScopedEventManager = self._connector.ws
+        loop = asyncio.get_event_loop()
+
+        try:
+            while not self.closed:
+                self._ws = await local_session.ws_connect(
+                    self.ws_address, ssl=False, max_msg_size=MAX_WS_MSG_SIZE)
+                self.last_frame_at = loop.time()
+                ws_manager.bind(self)
+
+                await self._receive_ws(ws_manager, loop)
+
+                ws_manager.unbind()
+                await self._ws.close()
+
+                if self._reconnect_requested:
+                    self._reconnect_requested = False
+
+                elif self.closed or not await self._api_alive():
+                    break
+
+                self.ws_reconnects += 1
+
+        finally:
+            ws_manager.unbind()
+            if self._ws:
+                await self._ws.close()
+            await local_session.close()
+
+    async def _receive_ws(self, ws_manager: 'PhaseScopedEventManager',
+                          loop: asyncio.AbstractEventLoop) -> None:
+        while not self.closed:
+            msg = await self._ws.receive()
+            self.last_frame_at = loop.time()
+
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                try:
+                    message = json_codec.loads(msg.data)
+
+                except json_codec.JSONDecodeError:
+                    continue
+
+                if message[0] == WAMP_EVENT:
+                    ws_manager.match_event(self._connector, self, message[2])
+
+            elif msg.type in (aiohttp.WSMsgType.CLOSE,
+                              aiohttp.WSMsgType.CLOSING,
+                              aiohttp.WSMsgType.CLOSED,
+                              aiohttp.WSMsgType.ERROR):
+                return
+
+    async def _api_alive(self) -> bool:
+        try:
+            res = await self.request('get', '/riotclient/region-locale')
+            return res.status == 200
+
+        except aiohttp.ClientError:
+            return False
+
+    async def reconnect_ws(self) -> None:
+        '''Close the websocket, run_ws opens a new one, subscribes the
+        active topics again and primes them with their current state, see
+        wait_primed.'''
+
+        if self._ws and not self._ws.closed:
+            self._reconnect_requested = True
+            self._connector.ws.unbind()
+            await self._ws.close()
+
+    async def wait_primed(self) -> None:
+        '''Wait until the websocket is subscribed and its topics primed.'''
+
+        await self._connector.ws.primed.wait()
+
+
+class PatientConnector(Connector):
+    '''Connector which creates PatientConnection objects. The client
+    process discovery sleeps between the lookups as well.
+
+    It supervises the client: when the connection ends (the client has
+    been closed, patched or has crashed) it looks for the process again
+    and connects to the new one, until stop() is called.'''
+
+    PROCESS_LOOKUP_DELAY: float = 0.5
+
+    def __init__(self, *, loop=None):
+        super().__init__(loop=loop)
+        self.ws: PhaseScopedEventManager = PhaseScopedEventManager()
+
+    @property
+    def should_run_ws(self) -> bool:
+        return len(self.ws.all_uris) > 0
+
+    def start(self) -> None:
+        try:
+            while True:
+                process = next(_return_ux_process(), None)
+                while not process:
+                    time.sleep(self.PROCESS_LOOKUP_DELAY)
+                    process = next(_return_ux_process(), None)
+
+                connection = PatientConnection(self, process)
+                self.register_connection(connection)
+
+                try:
+                    self.loop.run_until_complete(connection.init())
+
+                except Exception:
+                    # a broken connection must not stop the supervision
+                    logger.exception('The connection to the client failed.')
+
+                if not (self._repeat_flag and self.ws.all_uris):
+                    break
+
+        except KeyboardInterrupt:
+            pass
+
+        self.loop.close()
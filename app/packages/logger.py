@@ -0,0 +1,120 @@
+"""Project wide logging built on the standard logging module.
+
+Messages are formatted lazily (logger.info('x: %s', x) formats x only if the
+record is emitted), the console output can be silenced with a quiet mode and
+the file sink writes from a background thread, so hot paths like websocket
+handlers don't wait for the disk.
+
+Attributes:
+    OK (int): level of successfully finished actions, between INFO and WARNING.
+    LOG_DIR (str): absolute path to the directory with log files.
+
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Optional
+
+from termcolor import colored
+
+OK = 25
+logging.addLevelName(OK, 'OK')
+
+LOG_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'logs')
+
+ROOT_LOGGER_NAME = 'lol_afk_buddy'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class LogTag(str):
+    """Console tag (e.g. '[ OK  ]') which knows the log level it stands for, so it can be
+    printed directly as well as passed to log()."""
+
+    def __new__(cls, text: str, level: int):
+        tag = super().__new__(cls, text)
+        tag.level = level
+        return tag
+
+
+TAGS = {
+    logging.DEBUG: LogTag(f"[{colored('DEBUG', 'grey')}]", logging.DEBUG),
+    logging.INFO: LogTag(f"[{colored('INFO ', 'blue')}]", logging.INFO),
+    OK: LogTag(f"[{colored(' OK  ', 'green')}]", OK),
+    logging.WARNING: LogTag(f"[{colored('WARN ', 'yellow')}]", logging.WARNING),
+    logging.ERROR: LogTag(f"[{colored('ERROR', 'red')}]", logging.ERROR),
+}
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Prefixes messages with the same colored tags the app used to print."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        tag = TAGS.get(record.levelno, TAGS[logging.ERROR])
+        return f'{tag} {super().format(record)}'
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Returns a child of the project's logger, e.g. get_logger('connector')."""
+
+    return logging.getLogger(f'{ROOT_LOGGER_NAME}.{name}')
+
+
+def setup_logging(level: Optional[str] = None,
+                  quiet: Optional[bool] = None,
+                  filename: Optional[str] = 'lol_afk_buddy.log') -> None:
+    """Configures the project's logger. Should be called once by the entry point.
+
+    Args:
+        level: name of the lowest level which is logged, by default the LOL_AFK_BUDDY_LOG_LEVEL
+            environment variable or INFO.
+        quiet: production mode, only warnings and errors are shown in the console. By default
+            the LOL_AFK_BUDDY_QUIET environment variable.
+        filename: name of the log file in LOG_DIR, None disables the file sink.
+
+    """
+    global _listener
+
+    if level is None:
+        level = os.environ.get('LOL_AFK_BUDDY_LOG_LEVEL', 'INFO')
+    if quiet is None:
+        quiet = os.environ.get('LOL_AFK_BUDDY_QUIET', '') not in ('', '0')
+
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.setLevel(level.upper())
+    root.propagate = False
+
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+    console = logging.StreamHandler()
+    console.setFormatter(ConsoleFormatter('%(message)s'))
+    if quiet:
+        console.setLevel(logging.WARNING)
+    root.addHandler(console)
+
+    if filename:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        file_handler = logging.FileHandler(os.path.join(LOG_DIR, filename), encoding='utf-8')
+        file_handler.setFormatter(
+            logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s'))
+
+        # records are put on the queue and written by the listener's thread
+        records = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(records))
+        _listener = logging.handlers.QueueListener(records, file_handler)
+        _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flushes the records waiting for the file sink."""
+    global _listener
+
+    if _listener:
+        _listener.stop()
+        _listener = None
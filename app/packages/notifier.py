@@ -0,0 +1,37 @@
+import asyncio
+from typing import Dict, Iterable, Set
+
+
+class UriNotifier:
+    '''Wakes up coroutines which are waiting for a change of particular
+    websocket URIs. StateStore calls notify(uri) after it has stored
+    the new state of the uri, the Launcher subscribes an
+    asyncio.Event for URIs which are relevant for its current state.'''
+
+    def __init__(self) -> None:
+        self._listeners: Dict[str, Set[asyncio.Event]] = {}
+
+    def subscribe(self, uris: Iterable[str], event: asyncio.Event) -> None:
+        '''Set the event every time one of the uris changes.'''
+
+        for uri in uris:
+            self._listeners.setdefault(uri, set()).add(event)
+
+    def unsubscribe(self, event: asyncio.Event) -> None:
+        '''Stop waking up the event for any uri.'''
+
+        for listeners in self._listeners.values():
+            listeners.discard(event)
+
+    def notify(self, uri: str) -> None:
+        '''Wake up everyone who is interested in the uri.'''
+
+        for event in self._listeners.get(uri, ()):
+            event.set()
+
+    def notify_all(self) -> None:
+        '''Wake up every listener, e.g. after a local flag has changed.'''
+
+        for listeners in self._listeners.values():
+            for event in listeners:
+                event.set()
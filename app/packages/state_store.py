@@ -0,0 +1,100 @@
+import time
+from typing import Any, Dict, Optional
+
+from packages.notifier import UriNotifier
+
+# uris whose state is kept in the store
+LOBBY_URI: str = '/lol-lobby/v2/lobby'
+SESSION_URI: str = '/lol-champ-select/v1/session'
+QUEUE_URI: str = '/lol-game-queues/v1/queues'
+SEARCH_URI: str = '/lol-matchmaking/v1/search'
+READY_CHECK_URI: str = '/lol-matchmaking/v1/ready-check'
+GAMEFLOW_URI: str = '/lol-gameflow/v1/gameflow-phase'
+
+
+class UriState:
+    '''The latest known state of a uri. Instances are never modified,
+    a new one is stored for every event.'''
+
+    def __init__(self, uri: str, event_type: str, data: Any, seq: int,
+                 received_at: float) -> None:
+        self.uri: str = uri
+        self.type: str = event_type
+        self.data: Any = data
+        self.seq: int = seq
+        self.received_at: float = received_at
+
+    def __repr__(self) -> str:
+        return f'UriState({self.uri!r}, type={self.type!r}, seq={self.seq})'
+
+
+class StateStore:
+    '''State of the client keyed by uri, filled by the websocket handlers.
+
+    Every put() gets a sequence number which is higher than any number
+    given out before (also across uris and connections), so a consumer
+    which remembers the seq of the state it has processed can skip the
+    work if the seq has not changed, without looking at the payload.
+    Listeners of the notifier are woken up on every put().'''
+
+    def __init__(self, notifier: UriNotifier = None) -> None:
+        self._notifier: UriNotifier = notifier
+        self._states: Dict[str, UriState] = {}
+        self._seq: int = 0
+
+    def put(self, uri: str, event_type: str, data: Any,
+            received_at: float = None) -> UriState:
+        '''Store the new state of the uri. received_at is the
+        time.monotonic() the event has come from the websocket at (before
+        the ingestion delays), now if not given.'''
+
+        self._seq += 1
+        state = UriState(uri, event_type, data, self._seq,
+                         received_at or time.monotonic())
+        self._states[uri] = state
+
+        if self._notifier:
+            self._notifier.notify(uri)
+
+        return state
+
+    def get(self, uri: str) -> Optional[UriState]:
+        '''Return the latest state of the uri, None if nothing has been
+        received yet.'''
+
+        return self._states.get(uri)
+
+    def get_data(self, uri: str) -> Any:
+        state = self._states.get(uri)
+        return state.data if state else None
+
+    def get_seq(self, uri: str) -> int:
+        '''Sequence number of the latest state of the uri, 0 if nothing
+        has been received yet.'''
+
+        state = self._states.get(uri)
+        return state.seq if state else 0
+
+    def changed_since(self, uri: str, seq: int) -> bool:
+        return self.get_seq(uri) != seq
+
+    def get_staleness(self, uri: str) -> Optional[float]:
+        '''Seconds since the latest state of the uri has been received.'''
+
+        state = self._states.get(uri)
+        if state is None:
+            return None
+
+        return time.monotonic() - state.received_at
+
+    def discard(self, uri: str) -> None:
+        '''Forget the state of the uri, e.g. when its handler has been
+        detached and the state would get stale.'''
+
+        self._states.pop(uri, None)
+
+    def clear(self) -> None:
+        '''Forget every state, e.g. when the client has been closed. The
+        sequence keeps counting, so remembered numbers never match again.'''
+
+        self._states.clear()
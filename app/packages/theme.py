@@ -1,8 +1,8 @@
-import json
 from ntpath import join
 from typing import List
 from kivy.uix.widget import Widget
 import os
+from packages import json_codec
 from kivy.properties import (
     ObjectProperty,
     NumericProperty,
@@ -40,8 +40,7 @@ class Theme:
         theme_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'config')
         # theme_dir = "../config"  # works for me
 
-        with open(os.path.join(theme_dir, 'theme.json'), "r") as f:
-            read_themes = json.load(f)
+        read_themes = json_codec.load_file(os.path.join(theme_dir, 'theme.json'))
 
         self.info_color = read_themes["information_color"]
         self.deep_bckg_color = read_themes["deep_background_color"]
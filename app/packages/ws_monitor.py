@@ -0,0 +1,188 @@
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+from packages import json_codec
+from packages.lcu_connection import PatientConnection
+from packages.logger import get_logger
+from packages.state_store import GAMEFLOW_URI, StateStore
+
+logger = get_logger('ws_monitor')
+
+
+class WebsocketMonitor:
+    '''Heartbeat of the LCU connection. Periodically requests the
+    gameflow phase (a tiny payload the client answers instantly) to
+    measure the round-trip latency, and compares it with the phase the
+    websocket has delivered to the state store.
+
+    The websocket is considered degraded when it has been closed, when
+    the heartbeat fails several times in a row or when the phase known
+    from the websocket differs from the requested one on two consecutive
+    checks (a single mismatch may be an event which is on its way). A
+    degraded websocket is reopened by PatientConnection.reconnect_ws(),
+    which resubscribes the handlers and primes them with fresh state.
+
+    Between the first mismatch and the moment the new websocket has been
+    subscribed and primed the app was blind, the time is added to the
+    health metrics.'''
+
+    HEARTBEAT_URI: str = GAMEFLOW_URI
+
+    INTERVAL: float = 5.0
+    TIMEOUT: float = 3.0
+    MAX_FAILURES: int = 3
+    MAX_MISMATCHES: int = 2
+
+    # seconds to wait for the reopened websocket to be primed
+    RECONNECT_TIMEOUT: float = 30.0
+
+    # weight of the latest sample in the average latency
+    RTT_SMOOTHING: float = 0.2
+
+    def __init__(self, store: StateStore) -> None:
+        self._store: StateStore = store
+        self._task: Optional[asyncio.Task] = None
+        self._connection: PatientConnection = None
+
+        self._failures: int = 0
+        self._mismatches: int = 0
+        self._blind_since: Optional[float] = None
+
+        self.checks: int = 0
+        self.failed_checks: int = 0
+        self.rtt: Optional[float] = None
+        self.rtt_avg: Optional[float] = None
+        self.rtt_max: float = 0.0
+        self.reconnects: int = 0
+        self.blind_periods: int = 0
+        self.blind_seconds: float = 0.0
+
+    def start(self, connection: PatientConnection) -> None:
+        '''Start the heartbeat of the connection, should be called on
+        the connector's loop once the user is logged in.'''
+
+        self.stop()
+        self._connection = connection
+        self._failures = 0
+        self._mismatches = 0
+        self._blind_since = None
+        self._task = asyncio.ensure_future(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._connection = None
+
+    async def _run(self) -> None:
+        while not self._connection.closed:
+            await asyncio.sleep(self.INTERVAL)
+
+            if self._connection.closed:
+                break
+
+            if await self._is_degraded():
+                await self._reconnect()
+
+    async def _is_degraded(self) -> bool:
+        connection = self._connection
+        loop = asyncio.get_event_loop()
+
+        if connection._ws is None or connection._ws.closed:
+            return True
+
+        self.checks += 1
+        sent_at = loop.time()
+
+        try:
+            res = await asyncio.wait_for(
+                connection.request('get', self.HEARTBEAT_URI), self.TIMEOUT)
+            phase = json_codec.loads(await res.read()) \
+                if res.status == 200 else None
+
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            self.failed_checks += 1
+            self._failures += 1
+            logger.warning('Heartbeat of the LCU failed (%s in a row).',
+                           self._failures)
+            return self._failures >= self.MAX_FAILURES
+
+        self._failures = 0
+        self._record_rtt(loop.time() - sent_at)
+
+        known = self._store.get(self.HEARTBEAT_URI)
+        if known is None or known.data == phase:
+            # the websocket has caught up, a later reconnect is blind
+            # only since its own mismatch
+            self._mismatches = 0
+            self._blind_since = None
+            return False
+
+        self._mismatches += 1
+        if self._blind_since is None:
+            self._blind_since = sent_at
+
+        logger.debug('Websocket phase %s, requested phase %s.',
+                     known.data, phase)
+        return self._mismatches >= self.MAX_MISMATCHES
+
+    def _record_rtt(self, rtt: float) -> None:
+        self.rtt = rtt
+        self.rtt_max = max(self.rtt_max, rtt)
+
+        if self.rtt_avg is None:
+            self.rtt_avg = rtt
+        else:
+            self.rtt_avg += self.RTT_SMOOTHING * (rtt - self.rtt_avg)
+
+    async def _reconnect(self) -> None:
+        loop = asyncio.get_event_loop()
+        logger.warning('The websocket is degraded, reconnecting.')
+
+        if self._blind_since is None:
+            self._blind_since = loop.time()
+
+        await self._connection.reconnect_ws()
+
+        # run_ws primes the resubscribed uris with their current state,
+        # until then the app is still blind
+        try:
+            await asyncio.wait_for(self._connection.wait_primed(),
+                                   self.RECONNECT_TIMEOUT)
+
+        except asyncio.TimeoutError:
+            logger.warning('The websocket has not been primed in %s s.',
+                           self.RECONNECT_TIMEOUT)
+
+        self.reconnects += 1
+        self.blind_periods += 1
+        self.blind_seconds += loop.time() - self._blind_since
+
+        self._failures = 0
+        self._mismatches = 0
+        self._blind_since = None
+
+    def get_staleness(self) -> Optional[float]:
+        '''Seconds since the last websocket frame.'''
+
+        connection = self._connection
+        if connection is None or connection.last_frame_at is None:
+            return None
+
+        return asyncio.get_event_loop().time() - connection.last_frame_at
+
+    def get_health(self) -> dict:
+        return {
+            'running': self._task is not None,
+            'checks': self.checks,
+            'failed_checks': self.failed_checks,
+            'rtt': self.rtt,
+            'rtt_avg': self.rtt_avg,
+            'rtt_max': self.rtt_max,
+            'staleness': self.get_staleness(),
+            'reconnects': self.reconnects,
+            'blind_periods': self.blind_periods,
+            'blind_seconds': self.blind_seconds,
+        }
@@ -7,16 +7,19 @@ Attributes:
 
 """
 
-import json
-from time import sleep
+import asyncio
 import requests
 from bs4 import BeautifulSoup
 from typing import Optional, List
 from packages.utils import path_problem_solver
-from command import EndpointSender, EndpointSaver
+from packages import json_codec
+from packages.logger import get_logger
+from command import CommandResult, EndpointSender, EndpointSaver
 
-with open(path_problem_solver("data") + "\\" + "op_gg_rune_name_mapping.json", "r") as f:
-    PROBLEMATIC_NAMES = json.load(f)
+logger = get_logger('rune_maker')
+
+with open(path_problem_solver("data") + "\\" + "op_gg_rune_name_mapping.json", "rb") as f:
+    PROBLEMATIC_NAMES = json_codec.load(f)
 
 
 def _prepare_name(rune_name: str, prefix: Optional[str], suffix: Optional[str]) -> str:
@@ -97,24 +100,32 @@ def import_runes_for(champion_name: str, output_filename: str = "send_this_runes
     shards = [_prepare_name(shard, prefix_to_remove, suffix_to_remove) for shard in shards]
 
     # open file with [rune_name, rune_id] mapping
-    with open(path_problem_solver("data") + "//" + "rune_data.json", "r") as rune_id_data:
-        rune_data = json.load(rune_id_data)
+    with open(path_problem_solver("data") + "//" + "rune_data.json", "rb") as rune_id_data:
+        rune_data = json_codec.load(rune_id_data)
 
     all_runes = [keystone_perk_active, *perks, *shards]
     rune_ids = [_get_rune_id(rune_name, rune_data) for rune_name in all_runes]
 
-    with open(output_filename, "w+") as rune_ids_to_send:
-        json.dump(rune_ids, rune_ids_to_send, indent=4)
+    # the file is read only by the app, keep it compact
+    json_codec.dump_file(rune_ids, output_filename)
 
     return rune_ids
 
 
-def send_most_optimal_runes_for(champion: str) -> None:
+async def send_most_optimal_runes_for(champion: str) -> bool:
     """Function scrapes the best runes from u.gg for a provided champion and posts it to the LCU. In case of no
     place for another rune page the first fetched rune page will be deleted and in its place the new one is added.
+
+    Must be awaited on the connector's loop. Every step waits for the result of the previous one (its requests are
+    retried by the commands), so the new page is posted only once the old one is gone.
+
+    Returns:
+        Whether the new rune page has been added.
+
     """
 
-    runes = import_runes_for(champion_name=champion)
+    # the scraping blocks, keep it away from the loop
+    runes = await asyncio.get_event_loop().run_in_executor(None, import_runes_for, champion)
 
     # FIXME: add a JSON file with mapping {rune: style_id} if needed
     # empirically tested formulas for style ids
@@ -126,18 +137,22 @@ def send_most_optimal_runes_for(champion: str) -> None:
     # gets the user's current rune pages
     rune_pages_info_command = EndpointSaver(reqs="/lol-perks/v1/pages",
                                             filename="users_rune_pages")
-    rune_pages_info_command.execute()
+    result: CommandResult = await rune_pages_info_command.run()
+    if not result.ok:
+        logger.error("The rune pages couldn't be read (status: %s).", result.status)
+        return False
 
-    with open(path_problem_solver('JSONFiles') + "\\" + "users_rune_pages.json", "r") as rune_info_file:
-        rune_pages_data = json.load(rune_info_file)
+    with open(path_problem_solver('JSONFiles') + "\\" + "users_rune_pages.json", "rb") as rune_info_file:
+        rune_pages_data = json_codec.load(rune_info_file)
 
     # take the first rune page and delete it
     delete_rune_page_id = rune_pages_data[0]["id"]
     delete_page_command = EndpointSender(request=f"/lol-perks/v1/pages/{delete_rune_page_id}",
                                          request_type="delete")
-    delete_page_command.execute()
-
-    sleep(2)  # wait 2s for the LCU to update
+    result = await delete_page_command.run()
+    if not result.ok:
+        logger.error("The rune page %s couldn't be deleted (status: %s).", delete_rune_page_id, result.status)
+        return False
 
     # now we can try again and add the rune page for the requested champion
     request_data = {
@@ -158,5 +173,8 @@ def send_most_optimal_runes_for(champion: str) -> None:
                                                request_type="post",
                                                request_data=request_data)
 
-    add_new_rune_page_command.request_data = request_data
-    add_new_rune_page_command.execute()
+    result = await add_new_rune_page_command.run()
+    if not result.ok:
+        logger.error("The rune page couldn't be added (status: %s).", result.status)
+
+    return result.ok
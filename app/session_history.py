@@ -0,0 +1,139 @@
+import time
+from collections import deque
+from typing import Callable, FrozenSet, Iterator, NamedTuple, Optional, Tuple
+
+
+class SessionSnapshot(NamedTuple):
+    '''Immutable state of the champion select after a sync.
+
+    Team members and actions are frozen records (namedtuples made by
+    _Model._freeze). A snapshot shares the records, and whole tuples of
+    them, which have not changed with its predecessor, so keeping many
+    snapshots costs little more than the records that actually changed.'''
+
+    taken_at: float     # time.monotonic() of the sync
+    phase: str          # timer phase, e.g. 'BAN_PICK' or 'FINALIZATION'
+    my_team: tuple
+    their_team: tuple
+    actions: tuple
+    my_team_bans: Tuple[int, ...]
+    their_team_bans: Tuple[int, ...]
+    me: Optional[tuple]             # record of my team member
+    my_action: Optional[tuple]      # record of my action in progress
+    taken: FrozenSet[int]           # banned or picked champions
+    intended: FrozenSet[int]        # pick intents of my teammates
+
+    def get_action(self, action_id: int):
+        return next((action for action in self.actions
+                     if action.id == action_id), None)
+
+    def get_member(self, cell_id: int):
+        return next((member for member in (*self.my_team, *self.their_team)
+                     if member.cell_id == cell_id), None)
+
+    def is_available(self, champion_id: int,
+                     respect_intents: bool = True) -> bool:
+        '''Same as SessionManager.is_available at the time of the snapshot.'''
+
+        if champion_id in self.taken:
+            return False
+
+        return not (respect_intents and champion_id in self.intended)
+
+    def is_banned(self, champion_id: int) -> bool:
+        if champion_id in self.my_team_bans or champion_id in self.their_team_bans:
+            return True
+
+        return any(action.type == 'ban' and action.completed
+                   and action.champion_id == champion_id
+                   for action in self.actions)
+
+    def is_picked(self, champion_id: int) -> bool:
+        return any(action.type == 'pick' and action.completed
+                   and action.champion_id == champion_id
+                   for action in self.actions)
+
+
+class SessionHistory:
+    '''Ring buffer of the latest session snapshots, oldest first. Once it
+    is full, every new snapshot pushes out the oldest one.
+
+    Snapshots are appended in the order of their taken_at, so a snapshot
+    valid at a given moment is found by a binary search.'''
+
+    def __init__(self, maxlen: int) -> None:
+        self._snapshots: deque = deque(maxlen=maxlen)
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def __iter__(self) -> Iterator[SessionSnapshot]:
+        return iter(self._snapshots)
+
+    def append(self, snapshot: SessionSnapshot) -> None:
+        self._snapshots.append(snapshot)
+
+    def latest(self) -> Optional[SessionSnapshot]:
+        return self._snapshots[-1] if self._snapshots else None
+
+    def at(self, timestamp: float) -> Optional[SessionSnapshot]:
+        '''Return the snapshot which was current at timestamp (a
+        time.monotonic() value), None if it is older than the history.'''
+
+        snapshots = self._snapshots
+        low, high = 0, len(snapshots)
+
+        # the first snapshot taken after timestamp
+        while low < high:
+            middle = (low + high) // 2
+            if snapshots[middle].taken_at <= timestamp:
+                low = middle + 1
+            else:
+                high = middle
+
+        return snapshots[low - 1] if low else None
+
+    def ago(self, seconds: float) -> Optional[SessionSnapshot]:
+        '''Return the snapshot which was current the seconds ago.'''
+
+        return self.at(time.monotonic() - seconds)
+
+    def first(self, condition: Callable[[SessionSnapshot], bool]
+              ) -> Optional[SessionSnapshot]:
+        '''Return the oldest snapshot which meets the condition, e.g.
+        first(lambda s: s.is_banned(157)) tells when Yasuo got banned.'''
+
+        return next((snapshot for snapshot in self._snapshots
+                     if condition(snapshot)), None)
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+
+
+class SessionSummary(NamedTuple):
+    '''What the UI, the console and the notifications show about the
+    champion select, projected from a snapshot once per sync with the
+    champion ids already turned into names. Like the snapshot, it is
+    immutable and safe to read from any thread.'''
+
+    received_at: float      # time.monotonic() of the sync which built it
+    phase: str
+    my_position: str        # '' if the mode has no positions
+    my_champion: Optional[str]
+    # None for the members who have no champion yet
+    my_team_picks: Tuple[Optional[str], ...]
+    their_team_picks: Tuple[Optional[str], ...]
+    my_team_bans: Tuple[str, ...]
+    their_team_bans: Tuple[str, ...]
+    # seconds left in the phase at received_at, None if infinite
+    time_left: Optional[float]
+
+    def get_time_left(self) -> Optional[float]:
+        '''Seconds left in the phase now. The summary is not rebuilt for
+        updates which only move the timer, the time left is extrapolated
+        from the one it has been built with.'''
+
+        if self.time_left is None:
+            return None
+
+        return max(self.time_left - (time.monotonic() - self.received_at), 0.0)
@@ -1,12 +1,437 @@
 from __future__ import annotations
+import glob
+import os
+import time
 from abc import ABC, abstractmethod
+from collections import namedtuple
+from operator import attrgetter
+from typing import (Any, Callable, Dict, Hashable, Iterable, Iterator, List,
+                    NamedTuple, Optional, Set, Tuple)
+
+from packages import json_codec
+from packages.champNameIdMapper import ChampNameIdMapper
+from session_history import SessionHistory, SessionSnapshot, SessionSummary
+
+
+class Change(NamedTuple):
+    '''Single difference found by a sync, e.g. "action 7 completed True"
+    or "member 3 champion_pick_intent 157". field is the name of the
+    changed attribute, or 'added'/'removed' (value is the object) when
+    the whole action or team member appeared or disappeared.'''
+
+    kind: str   # 'action', 'member' or 'enemy'
+    key: int    # action id or cell id
+    field: str
+    value: Any
+
+    def __str__(self) -> str:
+        value = self.value if self.field not in ('added', 'removed') else ''
+        return f'{self.kind} {self.key} {self.field} {value}'.rstrip()
+
+
+class TurnPrediction(NamedTuple):
+    '''When my next action is going to start, see
+    SessionManager.predict_my_turn.'''
+
+    action: Action
+    turns_away: int         # 0 if the action is in progress
+    # seconds until the action starts (0 if it is in progress) and the
+    # time.monotonic() of that moment, None if the timer is infinite. It
+    # is the latest possible start, turns end early on a lock in.
+    starts_in: Optional[float]
+    starts_at: Optional[float]
+
+
+class UnavailableChampions:
+    '''Champions which can't be picked or banned in the current champion
+    select, kept up to date by the session sync instead of being collected
+    from the actions on every question.
+
+    A champion is unavailable for a set of reasons: a completed ban or
+    pick action ('action', id), a ban reported in the bans of either team
+    ('ban', team, index) or the pick intent of a teammate ('intent', cell).
+    It becomes available again when its last reason is gone.'''
+
+    def __init__(self) -> None:
+        # reason -> champion id and back
+        self._champion_of: Dict[Hashable, int] = {}
+        self._taken: Dict[int, Set[Hashable]] = {}
+        self._intended: Dict[int, Set[Hashable]] = {}
+
+        self._last_bans: dict = None
+
+    def set(self, reason: tuple, champion_id: Optional[int]) -> None:
+        '''Make the champion unavailable for the reason, a falsy champion
+        id (no champion) only removes the previous one.'''
+
+        if self._champion_of.get(reason) == champion_id:
+            return
+
+        champions = self._intended if reason[0] == 'intent' else self._taken
+
+        old = self._champion_of.pop(reason, None)
+        if old:
+            reasons = champions[old]
+            reasons.discard(reason)
+            if not reasons:
+                del champions[old]
+
+        if champion_id:
+            self._champion_of[reason] = champion_id
+            champions.setdefault(champion_id, set()).add(reason)
+
+    def sync_bans(self, bans: dict) -> None:
+        if bans == self._last_bans:
+            return
+
+        self._last_bans = bans
+
+        for team in ('myTeamBans', 'theirTeamBans'):
+            champion_ids: list = bans.get(team, [])
+            for index, champion_id in enumerate(champion_ids):
+                self.set(('ban', team, index), champion_id)
+
+            # bans which are not reported anymore
+            index = len(champion_ids)
+            while ('ban', team, index) in self._champion_of:
+                self.set(('ban', team, index), None)
+                index += 1
+
+    def is_available(self, champion_id: int,
+                     respect_intents: bool = True) -> bool:
+        if champion_id in self._taken:
+            return False
+
+        return not (respect_intents and champion_id in self._intended)
+
+    def first_available(self, champion_ids: Iterable[int],
+                        respect_intents: bool = True) -> Optional[int]:
+        '''Walk the priority list and return the first available champion.'''
+
+        for champion_id in champion_ids:
+            if self.is_available(champion_id, respect_intents):
+                return champion_id
+
+        return None
+
+    def get_all(self, respect_intents: bool = True) -> Set[int]:
+        if respect_intents:
+            return self._taken.keys() | self._intended.keys()
+
+        return set(self._taken)
+
+    def get_intended(self) -> Set[int]:
+        '''Champions teammates intend to pick, which are not taken yet.'''
+
+        return self._intended.keys() - self._taken.keys()
+
+    def clear(self) -> None:
+        self._champion_of.clear()
+        self._taken.clear()
+        self._intended.clear()
+        self._last_bans = None
 
 
 class SessionManager:
+    # snapshots kept in the history, a few minutes of a champion select
+    HISTORY_SIZE: int = 256
+
+    # length of a ban or pick turn if the timer doesn't tell it
+    DEFAULT_TURN_SECONDS: float = 30.0
+
     def __init__(self, summoner_id: int=None) -> None:
+        self.unavailable: UnavailableChampions = UnavailableChampions()
         self.my_team: Team = MyTeam(self)
+        self.their_team: Team = TheirTeam(self)
         self.actions: ActionList = ActionList(self)
         self.SUMMONER_ID: int = summoner_id
+
+        # champion ids banned by each team, as reported by the client
+        self.my_team_bans: List[int] = []
+        self.their_team_bans: List[int] = []
+
+        # changes made by the latest sync
+        self.changes: List[Change] = []
+
+        # immutable state after the latest sync which has changed something
+        # and the recent ones, see _publish
+        self.snapshot: Optional[SessionSnapshot] = None
+        self.history: SessionHistory = SessionHistory(self.HISTORY_SIZE)
+
+        # taken_at of the first snapshot of the latest champion select,
+        # older snapshots in the history belong to the previous ones
+        self.started_at: Optional[float] = None
+
+        # (change kind, key) -> frozen record of the member or action
+        self._frozen: Dict[tuple, tuple] = {}
+
+        # timer of the latest sync and the time.monotonic() it came at
+        self.timer: dict = {}
+        self.timer_received_at: float = None
+
+        # projection of the snapshot, see _summarize
+        self.summary: Optional[SessionSummary] = None
+
+    def sync_with_websocket(self, session: dict) -> List[Change]:
+        '''Patch the session in place with the data of a session event
+        and return what has changed.'''
+
+        # FIRST MUST BE SYNCED myTeam THAT'S IMPORTANT!!!
+        self.changes = [*self.my_team.sync_with_websocket(session['myTeam']),
+                        *self.their_team.sync_with_websocket(session['theirTeam']),
+                        *self.actions.sync_with_websocket(session['actions'])]
+
+        bans: dict = session['bans']
+        self.unavailable.sync_bans(bans)
+        self.my_team_bans = bans.get('myTeamBans', [])
+        self.their_team_bans = bans.get('theirTeamBans', [])
+
+        self.timer = session.get('timer', {})
+        self.timer_received_at = time.monotonic()
+
+        # most of the updates change only the timer, they publish nothing
+        # and the summary extrapolates the time left on its own
+        if self._publish():
+            self._summarize()
+
+        return self.changes
+
+    def sync_with_json(self, session: dict) -> None:
+        '''Build the session from scratch, e.g. from a captured session
+        file. Nothing is compared with the previous state and no changes
+        are reported, so it is cheaper than sync_with_websocket for
+        sessions which are not updates of each other.'''
+
+        # the snapshot of the previous session stays published until the
+        # new one is complete
+        self._reset()
+
+        # FIRST MUST BE SYNCED myTeam THAT'S IMPORTANT!!!
+        self.my_team.sync_with_json(session['myTeam'])
+        self.their_team.sync_with_json(session['theirTeam'])
+        self.actions.sync_with_json(session['actions'])
+
+        bans: dict = session['bans']
+        self.unavailable.sync_bans(bans)
+        self.my_team_bans = bans.get('myTeamBans', [])
+        self.their_team_bans = bans.get('theirTeamBans', [])
+
+        self.timer = session.get('timer', {})
+        self.timer_received_at = time.monotonic()
+
+        self._publish(rebuild=True)
+        self._summarize()
+
+    def get_snapshot(self) -> Optional[SessionSnapshot]:
+        '''The latest published state of the session, None if there is no
+        champion select.
+
+        The models are patched on the connector's loop, so other threads
+        (the console, the UI) may see them in the middle of a sync. The
+        snapshot is immutable and replaced by a single assignment once it
+        is complete, so it can be read from any thread without a lock.'''
+
+        return self.snapshot
+
+    def _publish(self, rebuild: bool = False) -> bool:
+        '''Publish a snapshot of the session and add it to the history if
+        anything but the timer has changed, return whether it has been.
+        Records of the members and actions which have not changed are
+        reused, and so are the tuples of the teams and actions if none of
+        their records has changed. rebuild freezes every record, e.g.
+        after sync_with_json.'''
+
+        previous: SessionSnapshot = self.snapshot
+        phase: str = self.timer.get('phase')
+
+        # the common timer only update is told apart without building
+        # anything
+        if not (self.changes or rebuild or previous is None) \
+                and phase == previous.phase \
+                and previous.my_team_bans == tuple(self.my_team_bans) \
+                and previous.their_team_bans == tuple(self.their_team_bans):
+            return False
+
+        my_team_bans = tuple(self.my_team_bans)
+        their_team_bans = tuple(self.their_team_bans)
+
+        for change in self.changes:
+            self._frozen.pop((change.kind, change.key), None)
+
+        if previous is None or rebuild:
+            kinds = {'member', 'enemy', 'action'}
+        else:
+            kinds = {change.kind for change in self.changes}
+
+            # equal tuples of bans are shared with the previous snapshot
+            if my_team_bans == previous.my_team_bans:
+                my_team_bans = previous.my_team_bans
+            if their_team_bans == previous.their_team_bans:
+                their_team_bans = previous.their_team_bans
+
+        my_team = self._freeze('member', self.my_team, 'cell_id') \
+            if 'member' in kinds else previous.my_team
+        their_team = self._freeze('enemy', self.their_team, 'cell_id') \
+            if 'enemy' in kinds else previous.their_team
+        actions = self._freeze('action', self.actions, 'id') \
+            if 'action' in kinds else previous.actions
+
+        me: TeamMember = self.my_team.get_me()
+        my_action: Action = self.actions.get_my_action()
+
+        # everything is built before the assignment, which publishes it
+        self.snapshot = SessionSnapshot(
+            taken_at=time.monotonic(),
+            phase=phase,
+            my_team=my_team,
+            their_team=their_team,
+            actions=actions,
+            my_team_bans=my_team_bans,
+            their_team_bans=their_team_bans,
+            me=self._frozen[('member', me.cell_id)] if me else None,
+            my_action=self._frozen[('action', my_action.id)]
+            if my_action else None,
+            taken=frozenset(self.unavailable.get_all(respect_intents=False)),
+            intended=frozenset(self.unavailable.get_intended()),
+        )
+        self.history.append(self.snapshot)
+
+        if previous is None or rebuild:
+            self.started_at = self.snapshot.taken_at
+
+        return True
+
+    def get_summary(self) -> Optional[SessionSummary]:
+        '''Names of the picks and bans, my position, the phase and the time
+        left, None if there is no champion select. Safe to read from any
+        thread, like get_snapshot().'''
+
+        return self.summary
+
+    def _summarize(self) -> None:
+        '''Project the new snapshot into the summary, with the names of the
+        champions and the time left of the current timer.'''
+
+        snapshot: SessionSnapshot = self.snapshot
+        timer: dict = self.timer
+
+        time_left: Optional[float] = None
+        if 'adjustedTimeLeftInPhase' in timer and not timer.get('isInfinite'):
+            time_left = timer['adjustedTimeLeftInPhase'] / 1000
+
+        # id (as a string) -> name, empty until the data is downloaded
+        names: dict = ChampNameIdMapper.get_champion_dict(order='reversed') \
+            if ChampNameIdMapper.champions_data else {}
+
+        def pick(champion_id: int) -> Optional[str]:
+            return names.get(str(champion_id), str(champion_id)) \
+                if champion_id else None
+
+        me = snapshot.me
+        self.summary = SessionSummary(
+            received_at=self.timer_received_at,
+            phase=snapshot.phase,
+            my_position=me.assigned_position if me else '',
+            my_champion=pick(me.champion_id) if me else None,
+            my_team_picks=tuple(pick(member.champion_id)
+                                for member in snapshot.my_team),
+            their_team_picks=tuple(pick(member.champion_id)
+                                   for member in snapshot.their_team),
+            my_team_bans=tuple(pick(ban) for ban in snapshot.my_team_bans),
+            their_team_bans=tuple(pick(ban) for ban in snapshot.their_team_bans),
+            time_left=time_left,
+        )
+
+    def _freeze(self, kind: str, models: list, key: str) -> tuple:
+        records: list = []
+
+        for model in models:
+            record = self._frozen.get((kind, getattr(model, key)))
+            if record is None:
+                record = self._frozen[kind, getattr(model, key)] = model._freeze()
+            records.append(record)
+
+        return tuple(records)
+
+    def predict_my_turn(self) -> Optional[TurnPrediction]:
+        '''Find my next action which is not completed, how many turns of
+        the action grid are ahead of it and when it is going to start at
+        the latest. None if I have no action left (or the session is not
+        in the planning or ban and pick phase).
+
+        In the ban and pick phase every turn lasts totalTimeInPhase of the
+        current one, in the planning phase the first turn starts when the
+        phase ends and the length of a turn is not known yet, so
+        DEFAULT_TURN_SECONDS is assumed.'''
+
+        phase: str = self.timer.get('phase')
+        if phase not in ('PLANNING', 'BAN_PICK'):
+            return None
+
+        action: Action = self.actions.get_my_next_action()
+        if action is None:
+            return None
+
+        turns_away: int = self.actions.get_turns_until(action)
+
+        if self.timer.get('isInfinite'):
+            return TurnPrediction(action, turns_away, None, None)
+
+        elapsed: float = time.monotonic() - self.timer_received_at
+        time_left: float = max(
+            self.timer['adjustedTimeLeftInPhase'] / 1000 - elapsed, 0.0)
+
+        if phase == 'PLANNING':
+            starts_in = time_left + turns_away * self.DEFAULT_TURN_SECONDS
+
+        elif turns_away:
+            turn_length: float = self.timer['totalTimeInPhase'] / 1000
+            starts_in = time_left + (turns_away - 1) * turn_length
+
+        else:
+            starts_in = 0.0
+
+        return TurnPrediction(action, turns_away, starts_in,
+                              time.monotonic() + starts_in)
+
+    def get_snapshot_at(self, timestamp: float) -> Optional[SessionSnapshot]:
+        '''Session as it was at timestamp (a time.monotonic() value).'''
+
+        return self.history.at(timestamp)
+
+    def get_snapshot_ago(self, seconds: float) -> Optional[SessionSnapshot]:
+        return self.history.ago(seconds)
+
+    def when_banned(self, champion_id: int) -> Optional[float]:
+        '''time.monotonic() of the first snapshot of the latest champion
+        select in which the champion is banned, None if it isn't (or the
+        ban is older than the history).'''
+
+        return self._when(lambda s: s.is_banned(champion_id))
+
+    def when_picked(self, champion_id: int) -> Optional[float]:
+        return self._when(lambda s: s.is_picked(champion_id))
+
+    def _when(self, condition: Callable[[SessionSnapshot], bool]
+              ) -> Optional[float]:
+        if self.started_at is None:
+            return None
+
+        started_at: float = self.started_at
+        snapshot = self.history.first(
+            lambda s: s.taken_at >= started_at and condition(s))
+        return snapshot.taken_at if snapshot else None
+
+    def is_available(self, champion_id: int,
+                     respect_intents: bool = True) -> bool:
+        '''False if the champion has been banned or picked (or a teammate
+        intends to pick it, unless respect_intents is false).'''
+
+        return self.unavailable.is_available(champion_id, respect_intents)
+
+    def first_available(self, champion_ids: Iterable[int],
+                        respect_intents: bool = True) -> Optional[int]:
+        return self.unavailable.first_available(champion_ids, respect_intents)
     
     def get_me_as_teammember(self) -> TeamMember:
         return self.my_team.get_me()
@@ -45,6 +470,33 @@ class SessionManager:
     
     def get_actions_with_unavailable_champions(self) -> list:
         return [*self.get_ban_type_actions(), *self.get_pick_type_actions()]
+
+    def get_action(self, action_id: int) -> Action:
+        return self.actions.get_action(action_id)
+
+    def get_actions_by_champion(self, champion_id: int) -> list:
+        return self.actions.get_actions_by_champion(champion_id)
+
+    def get_member(self, cell_id: int) -> TeamMember:
+        return self.my_team.get_member(cell_id)
+
+    def get_member_by_summoner(self, summoner_id: int) -> TeamMember:
+        return self.my_team.get_member_by_summoner(summoner_id)
+
+    def get_enemy(self, cell_id: int) -> TeamMember:
+        return self.their_team.get_member(cell_id)
+
+    def get_enemy_by_champion(self, champion_id: int) -> TeamMember:
+        return self.their_team.get_member_by_champion(champion_id)
+
+    def get_enemy_champion_ids(self) -> List[int]:
+        return self.their_team.get_champion_ids()
+
+    def get_my_team_bans(self) -> List[int]:
+        return self.my_team_bans
+
+    def get_their_team_bans(self) -> List[int]:
+        return self.their_team_bans
     
     # def get_my_active_action(self) -> Action:
     #     '''Try to get your active action. If your action is
@@ -64,9 +516,89 @@ class SessionManager:
     
     def set_summoner_id(self, arg_summoner_id: int):
         self.SUMMONER_ID: int = arg_summoner_id
+
+        # looked up again by the next sync
+        self.my_team.me = None
+
+    def clear(self) -> None:
+        '''Forget the champion select, e.g. when it has ended or the client
+        has been closed.'''
+
+        self._reset()
+        self.snapshot = None
+        self.summary = None
+
+    def _reset(self) -> None:
+        self.my_team.reset()
+        self.their_team.reset()
+        self.actions.reset()
+        self.my_team_bans = []
+        self.their_team_bans = []
+        self.unavailable.clear()
+        self.changes = []
+
+        # the history is kept, the last champion select can be inspected
+        # after it has ended
+        self._frozen.clear()
+        self.timer = {}
+        self.timer_received_at = None
     
 
-class Action:
+class _Model:
+    '''Base of the session models. Attributes live in __slots__, so an
+    instance is a fixed size record without a __dict__. Instances are
+    equal if all their attributes are equal.'''
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}'
+                           for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+
+        return all(getattr(self, name) == getattr(other, name)
+                   for name in self.__slots__)
+
+    # mutable, the objects are patched in place
+    __hash__ = None
+
+    # immutable record of the attributes, made by _freeze, and the getter
+    # of all of them at once, in the order of the record's fields (an
+    # attrgetter is not bound to the instance, it is passed explicitly)
+    SNAPSHOT: type = tuple
+    _VALUES: Callable[['_Model'], tuple] = None
+
+    def _freeze(self) -> tuple:
+        return tuple.__new__(self.SNAPSHOT, self._VALUES(self))
+
+    def _load(self, data: dict) -> None:
+        '''Assign all the attributes from data without comparing them,
+        keys of data which are not in FIELDS are never looked at.'''
+
+        for name, key in self.FIELDS.items():
+            setattr(self, name, data[key])
+
+
+class Action(_Model):
+    # attribute name -> key in the session json
+    FIELDS: Dict[str, str] = {
+        'actor_cell_id': 'actorCellId',
+        'champion_id': 'championId',
+        'completed': 'completed',
+        'id': 'id',
+        'is_ally_action': 'isAllyAction',
+        'is_in_progress': 'isInProgress',
+        'type': 'type',
+    }
+
+    __slots__ = tuple(FIELDS)
+    SNAPSHOT: type = namedtuple('ActionSnapshot', FIELDS)
+    _VALUES = attrgetter(*FIELDS)
+
     def __init__(self) -> None:
         '''Construdtor of Action should not assign any data to attributes.'''
 
@@ -78,17 +610,13 @@ class Action:
         self.is_in_progress: bool = None
         self.type: str = None
 
-    def _update_action(self, action: dict):
+    def _update_action(self, action: dict) -> List[tuple]:
         '''This method assigns data to attributes based on provided json
-        file. argument should be dictionary without any nested dictionaries.'''
-        
-        self.actor_cell_id: int = action['actorCellId']
-        self.champion_id: int = action['championId']
-        self.completed: bool = action['completed']
-        self.id: int = action['id']
-        self.is_ally_action: bool = action['isAllyAction']
-        self.is_in_progress: bool = action['isInProgress']
-        self.type: str = action['type']
+        file. argument should be dictionary without any nested dictionaries.
+        Only changed attributes are assigned, (name, value) pairs of them
+        are returned.'''
+
+        return _patch(self, self.FIELDS, action)
     
 
 class ActionList(list):
@@ -100,7 +628,22 @@ class ActionList(list):
 
         # your summoner action which is currently in progress
         self.my_action: Action = None
-        self.actions_in_progress: list = None
+        self.actions_in_progress: list = []
+        self.ban_actions: list = []
+        self.pick_actions: list = []
+
+        # indexes maintained by sync_with_websocket
+        self._by_id: Dict[int, Action] = {}
+        self._by_champion: Dict[int, Dict[int, Action]] = {}
+        self._in_progress_by_cell: Dict[int, Action] = {}
+
+        # action id -> index of its turn in the action grid
+        self._turn_of: Dict[int, int] = {}
+
+        # json of the previous sync, unchanged entries are skipped by
+        # comparing the dicts, which is much cheaper than field by field
+        self._last: list = None
+        self._last_by_id: Dict[int, dict] = {}
     
     def get_actions_in_progress(self) -> list:
         '''This method shouldn't iterate through ActionList to find actions in
@@ -128,61 +671,188 @@ class ActionList(list):
     
     def get_ban_actions(self) -> list:
         return self.ban_actions
+
+    def get_action(self, action_id: int) -> Action:
+        return self._by_id.get(action_id)
+
+    def get_actions_by_champion(self, champion_id: int) -> list:
+        '''Actions (bans, picks and hovers) of the champion.'''
+
+        return list(self._by_champion.get(champion_id, {}).values())
+
+    def get_action_in_progress_of(self, cell_id: int) -> Action:
+        return self._in_progress_by_cell.get(cell_id)
     
     def get_pick_actions(self) -> list:
         return self.pick_actions
+
+    def get_turn(self, action: Action) -> Optional[int]:
+        '''Index of the turn of the action in the action grid.'''
+
+        return self._turn_of.get(action.id)
+
+    def get_current_turn(self) -> Optional[int]:
+        '''The turn in progress, or the first one which is not completed
+        if none is in progress (e.g. in the planning phase). None when all
+        the actions are completed.'''
+
+        if self.actions_in_progress:
+            return min(self._turn_of[action.id]
+                       for action in self.actions_in_progress)
+
+        return next((self._turn_of[action.id] for action in self
+                     if not action.completed), None)
+
+    def get_my_next_action(self) -> Optional[Action]:
+        '''My first action which is not completed, in progress or not.'''
+
+        me: TeamMember = self.session_manager.get_me_as_teammember()
+        if me is None:
+            return None
+
+        return next((action for action in self if not action.completed
+                     and action.actor_cell_id == me.cell_id), None)
+
+    def get_turns_until(self, action: Action) -> int:
+        '''Number of turns before the turn of the action starts, 0 if it
+        is the current turn.'''
+
+        current: Optional[int] = self.get_current_turn()
+        if current is None:
+            return 0
+
+        return max(self._turn_of[action.id] - current, 0)
     
-    def sync_with_websocket(self, actions: list) -> None:
+    def sync_with_websocket(self, actions: list) -> List[Change]:
+        '''Patch the actions in place, keyed by action id. Objects of the
+        actions which still exist are kept, only their changed attributes
+        are assigned, and the lists of actions in progress, completed bans
+        and picks are updated only for the changed actions.'''
 
+        # most of the updates change only the timer
+        if actions == self._last:
+            self._update_my_action()
+            return []
 
-        # Helper iterator to keep the code clean
-        iter_action = self._iter_actions(actions)
+        self._last = actions
+        self._turn_of = {_action['id']: turn for turn, action_container
+                         in enumerate(actions) for _action in action_container}
+        changes: List[Change] = []
+        ids: list = []
 
-        # my_action is my action + active action
-        self.my_action: Action = None
-        self.actions_in_progress: list = list()
-        self.ban_actions: list = list()
-        self.pick_actions: list = list()
+        for _action in self._iter_actions(actions):
+            action_id: int = _action['id']
+            ids.append(action_id)
+
+            if self._last_by_id.get(action_id) == _action:
+                continue
+
+            self._last_by_id[action_id] = _action
+            action: Action = self._by_id.get(action_id)
+
+            if action is None:
+                action = self._by_id[action_id] = Action()
+                action._update_action(_action)
+                changes.append(Change('action', action_id, 'added', action))
+                self._index(action)
+                self._update_derived(action)
+                continue
+
+            self._unindex(action)
+            fields = action._update_action(_action)
+            self._index(action)
+
+            if fields:
+                changes.extend(Change('action', action_id, field, value)
+                               for field, value in fields)
+                self._update_derived(action)
 
+        for action_id in self._by_id.keys() - set(ids):
+            action = self._by_id.pop(action_id)
+            self._last_by_id.pop(action_id, None)
+            changes.append(Change('action', action_id, 'removed', action))
+            self._unindex(action)
+            self._forget(action)
+
+        # the order only changes when actions are added or removed
+        if len(ids) != len(self) or any(action.id != action_id
+                                        for action, action_id in zip(self, ids)):
+            self[:] = [self._by_id[action_id] for action_id in ids]
+
+        self._update_my_action()
+        return changes
+
+    def _index(self, action: Action) -> None:
+        if action.champion_id:
+            self._by_champion.setdefault(action.champion_id, {})[action.id] = action
+
+        if action.is_in_progress:
+            self._in_progress_by_cell[action.actor_cell_id] = action
+
+    def _unindex(self, action: Action) -> None:
+        actions: dict = self._by_champion.get(action.champion_id)
+        if actions:
+            actions.pop(action.id, None)
+            if not actions:
+                del self._by_champion[action.champion_id]
+
+        if self._in_progress_by_cell.get(action.actor_cell_id) is action:
+            del self._in_progress_by_cell[action.actor_cell_id]
+
+    def _update_derived(self, action: Action) -> None:
+        self.session_manager.unavailable.set(
+            ('action', action.id), action.champion_id if action.completed else None)
+
+        _keep_if(self.actions_in_progress, action, action.is_in_progress)
+        _keep_if(self.ban_actions, action,
+                 action.completed and action.type == 'ban')
+        _keep_if(self.pick_actions, action,
+                 action.completed and action.type == 'pick')
+
+    def _forget(self, action: Action) -> None:
+        self.session_manager.unavailable.set(('action', action.id), None)
+
+        for derived in (self.actions_in_progress, self.ban_actions,
+                        self.pick_actions):
+            _keep_if(derived, action, False)
+
+    def _update_my_action(self) -> None:
+        # my_action is my action + active action, my cell may have changed
+        # as well, so it is looked up on every sync
+        me: TeamMember = self.session_manager.get_me_as_teammember()
+        my_cell_id: int = me.cell_id if me else None
+
+        self.my_action = self._in_progress_by_cell.get(my_cell_id)
+
+    def reset(self) -> None:
         self.clear()
-        # Iterate through all team members provied by argument (list from json)
-        for _action in iter_action:
-
-            # Creagte new instance of action for each element from the lists
-            new_action = Action()
-
-            # Update attributes of this instance using helper method
-            new_action._update_action(_action)
-            # Update attributes of this instance using helper method
-            self.append(new_action)
-            
-            # If newly created instance's actor_cell_id attribute is filled 
-            # with data wich value is equal to your cell id of current session
-            # and the action is in progress,
-            # update my_action wich represents your action object in
-            # session (the action part). Note that this is always checked
-            # when sync occures (this is - when websocked is CREATED, UPDATED)
-
-            # Gather all action instances wich are tagged as 'isInProgress'
-            if new_action.is_in_progress:
-                self.actions_in_progress.append(new_action)
-
-                if new_action.actor_cell_id == \
-                    self.session_manager.get_my_cell_id():
-
-                    self.my_action = new_action
-            
-            # Append ban and pick to ban_actions and pick_action respectively
-            if new_action.completed:
-                if new_action.type == 'ban':
-                    self.ban_actions.append(new_action)
-                
-                elif new_action.type == 'pick':
-                    self.pick_actions.append(new_action)
-            
-    
+        self._by_id.clear()
+        self._by_champion.clear()
+        self._in_progress_by_cell.clear()
+        self._last = None
+        self._last_by_id.clear()
+        self._turn_of = {}
+        self.my_action = None
+        self.actions_in_progress = []
+        self.ban_actions = []
+        self.pick_actions = []
+
     def sync_with_json(self, actions: list) -> None:
-        pass
+        '''Replace the actions with new ones built from actions, see
+        SessionManager.sync_with_json.'''
+
+        self.reset()
+        self._turn_of = {_action['id']: turn for turn, action_container
+                         in enumerate(actions) for _action in action_container}
+
+        for _action in self._iter_actions(actions):
+            action = self._by_id[_action['id']] = Action()
+            action._load(_action)
+            self.append(action)
+            self._index(action)
+            self._update_derived(action)
+
+        self._update_my_action()
     
     def _iter_actions(self, actions: dict):
         for action_container in actions:
@@ -190,9 +860,28 @@ class ActionList(list):
                 yield action
     
 
-class TeamMember:
+class TeamMember(_Model):
     '''Representation of user in session'''
 
+    # attribute name -> key in the session json
+    FIELDS: Dict[str, str] = {
+        'assigned_position': 'assignedPosition',
+        'cell_id': 'cellId',
+        'champion_id': 'championId',
+        'champion_pick_intent': 'championPickIntent',
+        'entitled_feature_type': 'entitledFeatureType',
+        'selected_skin_id': 'selectedSkinId',
+        'spell1_id': 'spell1Id',
+        'spell2_id': 'spell2Id',
+        'summoner_id': 'summonerId',
+        'team': 'team',
+        'ward_skin_id': 'wardSkinId',
+    }
+
+    __slots__ = tuple(FIELDS)
+    SNAPSHOT: type = namedtuple('TeamMemberSnapshot', FIELDS)
+    _VALUES = attrgetter(*FIELDS)
+
     def __init__(self) -> None:
         self.assigned_position: str = None
         self.cell_id: int = None
@@ -206,21 +895,13 @@ class TeamMember:
         self.team: int = None
         self.ward_skin_id: int = None
     
-    def _update_team_member(self, team_member: dict):
+    def _update_team_member(self, team_member: dict) -> List[tuple]:
         '''This method assigns data to attributes based on provided json
-        file. argument should be dictionary without any nested dictionaries.'''
-
-        self.assigned_position: str = team_member['assignedPosition']
-        self.cell_id: int = team_member['cellId']
-        self.champion_id: int = team_member['championId']
-        self.champion_pick_intent: int = team_member['championPickIntent']
-        self.entitled_feature_type: str = team_member['entitledFeatureType']
-        self.selected_skin_id: int = team_member['selectedSkinId']
-        self.spell1_id: int = team_member['spell1Id']
-        self.spell2_id: int = team_member['spell2Id']
-        self.summoner_id = team_member['summonerId']
-        self.team: int = team_member['team']
-        self.ward_skin_id: int = team_member['wardSkinId']
+        file. argument should be dictionary without any nested dictionaries.
+        Only changed attributes are assigned, (name, value) pairs of them
+        are returned.'''
+
+        return _patch(self, self.FIELDS, team_member)
         
 
 class Team(ABC):
@@ -241,10 +922,126 @@ class Team(ABC):
         pass
 
 
-class MyTeam(list, Team):
+class _TeamList(list, Team):
+    '''Team members patched in place and indexed by cell, summoner and
+    champion, shared by MyTeam and TheirTeam.'''
+
+    # kind of the changes reported by the sync
+    KIND: str = 'member'
+
     def __init__(self, arg_session_manager: SessionManager) -> None:
         super().__init__()
         self.session_manager: SessionManager = arg_session_manager
+
+        # indexes maintained by sync_with_websocket
+        self._by_cell: Dict[int, TeamMember] = {}
+        self._by_summoner: Dict[int, TeamMember] = {}
+        self._by_champion: Dict[int, TeamMember] = {}
+
+        # json of the previous sync, see ActionList
+        self._last: list = None
+        self._last_by_cell: Dict[int, dict] = {}
+
+    def get_member(self, cell_id: int) -> TeamMember:
+        return self._by_cell.get(cell_id)
+
+    def get_member_by_summoner(self, summoner_id: int) -> TeamMember:
+        return self._by_summoner.get(summoner_id)
+
+    def get_member_by_champion(self, champion_id: int) -> TeamMember:
+        return self._by_champion.get(champion_id)
+
+    def get_champion_ids(self) -> List[int]:
+        '''Champions picked (or hovered, until the pick is locked in) by
+        the members, in the order of the cells.'''
+
+        return [member.champion_id for member in self if member.champion_id]
+
+    def sync_with_websocket(self, team_members: list) -> List[Change]:
+        '''Patch the team members in place, keyed by cell id. Objects of
+        the members who are still in the team are kept, only their changed
+        attributes are assigned.'''
+
+        if team_members == self._last:
+            return []
+
+        self._last = team_members
+        changes: List[Change] = []
+        cells: list = []
+
+        for _team_member in team_members:
+            cell_id: int = _team_member['cellId']
+            cells.append(cell_id)
+
+            if self._last_by_cell.get(cell_id) == _team_member:
+                continue
+
+            self._last_by_cell[cell_id] = _team_member
+            member: TeamMember = self._by_cell.get(cell_id)
+
+            if member is None:
+                member = self._by_cell[cell_id] = TeamMember()
+                member._update_team_member(_team_member)
+                changes.append(Change(self.KIND, cell_id, 'added', member))
+                self._index(member)
+                continue
+
+            self._unindex(member)
+            changes.extend(Change(self.KIND, cell_id, field, value) for field, value
+                           in member._update_team_member(_team_member))
+            self._index(member)
+
+        for cell_id in self._by_cell.keys() - set(cells):
+            member = self._by_cell.pop(cell_id)
+            self._last_by_cell.pop(cell_id, None)
+            changes.append(Change(self.KIND, cell_id, 'removed', member))
+            self._unindex(member)
+
+        if len(cells) != len(self) or any(member.cell_id != cell_id
+                                          for member, cell_id in zip(self, cells)):
+            self[:] = [self._by_cell[cell_id] for cell_id in cells]
+
+        return changes
+
+    def _index(self, member: TeamMember) -> None:
+        # summoners hidden by the client (e.g. in ranked) have id 0
+        if member.summoner_id:
+            self._by_summoner[member.summoner_id] = member
+
+        if member.champion_id:
+            self._by_champion[member.champion_id] = member
+
+    def _unindex(self, member: TeamMember) -> None:
+        if self._by_summoner.get(member.summoner_id) is member:
+            del self._by_summoner[member.summoner_id]
+
+        if self._by_champion.get(member.champion_id) is member:
+            del self._by_champion[member.champion_id]
+
+    def reset(self) -> None:
+        self.clear()
+        self._by_cell.clear()
+        self._by_summoner.clear()
+        self._by_champion.clear()
+        self._last = None
+        self._last_by_cell.clear()
+
+    def sync_with_json(self, team_members: list) -> None:
+        '''Replace the members with new ones built from team_members, see
+        SessionManager.sync_with_json.'''
+
+        self.reset()
+
+        for _team_member in team_members:
+            member = self._by_cell[_team_member['cellId']] = TeamMember()
+            member._load(_team_member)
+            self.append(member)
+            self._index(member)
+
+
+class MyTeam(_TeamList):
+    def __init__(self, arg_session_manager: SessionManager) -> None:
+        super().__init__(arg_session_manager)
         self.me: TeamMember = None
     
     def get_me(self) -> TeamMember:
@@ -253,32 +1050,111 @@ class MyTeam(list, Team):
         always be updated.'''
 
         return self.me
-    
-    def sync_with_websocket(self, team_members: list) -> None:
 
-        self.clear()
-        # Iterate through all team members provied by argument (list from json)
-        for _team_member in team_members:
-            # Creagte new instance of member for each element from the list
-            new_team_member: TeamMember = TeamMember()
-
-            # Update attributes of this instance using helper method
-            new_team_member._update_team_member(_team_member)
-            # Apped new instance to object itself (MyTeam instance)
-            self.append(new_team_member)
-
-            # If newly created instance's summoner_id attribute is filled with
-            # data wich value is equal to your user's summoner id update
-            # self.me wich represents your character and and actions in
-            # session (the myTeam part). Note that this is always checked
-            # when sync occures (this is - when websocked is CREATED, UPDATED)
-            if new_team_member.summoner_id == self.session_manager.SUMMONER_ID:
-                self.me = new_team_member
-    
+    def sync_with_websocket(self, team_members: list) -> List[Change]:
+        changes: List[Change] = super().sync_with_websocket(team_members)
+
+        # self.me represents your character in session (the myTeam part),
+        # it can change only with the members
+        if changes or self.me is None:
+            self.me = self._by_summoner.get(self.session_manager.SUMMONER_ID)
+
+        return changes
+
     def sync_with_json(self, team_members: list) -> None:
-        pass
+        super().sync_with_json(team_members)
+        self.me = self._by_summoner.get(self.session_manager.SUMMONER_ID)
 
+    def _index(self, member: TeamMember) -> None:
+        super()._index(member)
 
-class TheirTeam(list, Team):
-    def __init__(self) -> None:
-        super().__init__()
\ No newline at end of file
+        # my own intent doesn't make the champion unavailable to me
+        if member.summoner_id != self.session_manager.SUMMONER_ID:
+            self.session_manager.unavailable.set(
+                ('intent', member.cell_id), member.champion_pick_intent)
+
+    def _unindex(self, member: TeamMember) -> None:
+        super()._unindex(member)
+        self.session_manager.unavailable.set(('intent', member.cell_id), None)
+
+    def reset(self) -> None:
+        super().reset()
+        self.me = None
+
+
+class TheirTeam(_TeamList):
+    '''The enemy team. The client hides the summoners (their id is 0)
+    and the pick intents, champions show up once they are picked (or
+    hovered in blind pick).'''
+
+    KIND: str = 'enemy'
+
+
+def _patch(obj, fields: Dict[str, str], data: dict) -> List[tuple]:
+    '''Assign the values of data (keyed by json keys) which differ from
+    the attributes of obj, return (attribute, value) pairs of the changes.'''
+
+    changed: List[tuple] = []
+
+    for name, key in fields.items():
+        value = data[key]
+        if getattr(obj, name) != value:
+            setattr(obj, name, value)
+            changed.append((name, value))
+
+    return changed
+
+
+def _keep_if(items: list, item, condition: bool) -> None:
+    '''Make item part of items if condition is true, remove it otherwise.
+    Items are compared by identity, field-wise equality is not needed.'''
+
+    for index, existing in enumerate(items):
+        if existing is item:
+            if not condition:
+                del items[index]
+            return
+
+    if condition:
+        items.append(item)
+
+
+def iter_captured_sessions(directory: str, summoner_id: int = None
+                           ) -> Iterator[Tuple[str, SessionManager]]:
+    '''Load the champion select sessions captured in the directory (and
+    its subdirectories), e.g. JSONfiles/, one at a time.
+
+    Files are read only when the next session is asked for, and files
+    which don't contain a session (lobby, search, ...) are skipped by
+    looking at their bytes, without decoding them. The sessions are built
+    by sync_with_json. If summoner_id is not given, the local player of
+    each capture (its localPlayerCellId) is used.
+
+    Yields (path, session manager) pairs, in the order of the paths.'''
+
+    pattern = os.path.join(directory, '**', '*.json')
+
+    for path in sorted(glob.iglob(pattern, recursive=True)):
+        with open(path, 'rb') as file:
+            raw: bytes = file.read()
+
+        if b'"localPlayerCellId"' not in raw:
+            continue
+
+        try:
+            session = json_codec.loads(raw)
+        except json_codec.JSONDecodeError:
+            continue
+
+        if not (isinstance(session, dict) and 'myTeam' in session):
+            continue
+
+        session_manager = SessionManager(summoner_id)
+        if summoner_id is None:
+            session_manager.set_summoner_id(next(
+                (member['summonerId'] for member in session['myTeam']
+                 if member['cellId'] == session.get('localPlayerCellId')),
+                None))
+
+        session_manager.sync_with_json(session)
+        yield path, session_manager
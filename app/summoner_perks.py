@@ -12,13 +12,13 @@ Attributes:
 """
 
 import os
-import json
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 from kivy.properties import StringProperty, ListProperty
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.dropdown import DropDown
 from kivy.uix.button import Button
 from packages.utils import path_problem_solver
+from packages import json_codec
 from command import EndpointSender
 
 
@@ -28,18 +28,18 @@ ICONS_PATH = path_problem_solver("img", "summoner_spells_icons")
 
 CHAMPION_PERKS_SETTINGS_PATH = path_problem_solver("data") + "\\" + "champion_select_perks.json"
 # loads saved data about in app champion select
-with open(CHAMPION_PERKS_SETTINGS_PATH, "r") as settings_file:
+with open(CHAMPION_PERKS_SETTINGS_PATH, "rb") as settings_file:
     try:
-        settings = json.load(settings_file)
-    except json.JSONDecodeError:
+        settings = json_codec.load(settings_file)
+    except json_codec.JSONDecodeError:
         settings = {"summoner_spells": None, "runes": None}
     finally:
         LOADED_SUMMONER_SPELLS, LOADED_RUNES = settings.values()
 
 
-def import_rune_pages() -> List[str]:
-    rune_pages = champion_select_utils.get_user_rune_pages()
-    return [rune_pages[0] for rune_pages in rune_pages]
+def import_rune_pages(callback: Callable[[List[str]], None]) -> None:
+    champion_select_utils.get_user_rune_pages(
+        lambda rune_pages: callback([rune_pages[0] for rune_pages in rune_pages]))
 
 
 def import_summoner_spell_icons() -> List[str]:
@@ -154,10 +154,13 @@ class RunesDropDown(DropDown):
 
     def _main_button_func(self, instance, x) -> None:
         if not self.runes_already_loaded:
-            rune_pages = champion_select_utils.get_user_rune_pages()
-            self._rune_pages = [rune_page[0] for rune_page in rune_pages]
-            self._display_rune_pages()
-            self.runes_already_loaded = True
+            # the dropdown is refreshed once the rune pages arrive
+            champion_select_utils.get_user_rune_pages(self._load_rune_pages)
+
+    def _load_rune_pages(self, rune_pages: List[Tuple[str, int]]) -> None:
+        self._rune_pages = [rune_page[0] for rune_page in rune_pages]
+        self._display_rune_pages()
+        self.runes_already_loaded = True
 
 
 class SummonerPerksSlotUI(BoxLayout):
@@ -244,11 +247,11 @@ class SummonerPerksSlotUI(BoxLayout):
 def send_user_defined_summoner_spells() -> None:
     """Sends summoner spells selected by the user to the LCU."""
 
-    with open(path_problem_solver("data") + "\\" + "champion_select_perks.json") as perks_file:
-        summoner_spell_data = json.load(perks_file)["summoner_spells"]
+    with open(path_problem_solver("data") + "\\" + "champion_select_perks.json", "rb") as perks_file:
+        summoner_spell_data = json_codec.load(perks_file)["summoner_spells"]
 
-    with open(path_problem_solver("data") + "\\" + "summoner_spells.json") as id_mapping_file:
-        id_name_data = json.load(id_mapping_file)
+    with open(path_problem_solver("data") + "\\" + "summoner_spells.json", "rb") as id_mapping_file:
+        id_name_data = json_codec.load(id_mapping_file)
         id_name_mapper = {name: id_ for (name, id_) in id_name_data}
 
     d_spell_name, f_spell_name = summoner_spell_data
@@ -0,0 +1,72 @@
+"""Compares the standard json module with app/packages/json_codec.py on the payloads
+captured in JSONfiles/ (lobby, search and session websocket dumps, LCU endpoints).
+
+Run from the repository root or from this directory:
+
+    python utillity/json_benchmark.py [repeats]
+
+Install orjson to see the difference, without it json_codec falls back to the
+standard library and both columns should be roughly equal.
+"""
+
+import glob
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from packages import json_codec  # noqa: E402
+
+
+def load_payloads():
+    paths = glob.glob(os.path.join(ROOT, "JSONfiles", "**", "*.json"), recursive=True)
+    payloads = []
+    for path in sorted(paths):
+        with open(path, "rb") as file:
+            raw = file.read()
+        try:
+            payloads.append((raw, json.loads(raw)))
+        except json.JSONDecodeError:
+            print(f"skipping {os.path.relpath(path, ROOT)}: not a valid JSON")
+    return payloads
+
+
+def measure(label, stdlib_fn, codec_fn, repeats):
+    stdlib_time = min(timeit.repeat(stdlib_fn, number=1, repeat=repeats))
+    codec_time = min(timeit.repeat(codec_fn, number=1, repeat=repeats))
+    print(f"{label:<28}{stdlib_time * 1000:>10.2f} ms{codec_time * 1000:>10.2f} ms"
+          f"{stdlib_time / codec_time:>9.1f}x")
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    payloads = load_payloads()
+    raw_size = sum(len(raw) for raw, _ in payloads)
+
+    print(f"backend: {json_codec.BACKEND}, files: {len(payloads)}, size: {raw_size / 1024:.0f} KiB")
+    print(f"{'':<28}{'stdlib':>13}{'json_codec':>13}{'speedup':>10}")
+
+    measure("decode",
+            lambda: [json.loads(raw) for raw, _ in payloads],
+            lambda: [json_codec.loads(raw) for raw, _ in payloads],
+            repeats)
+    measure("encode indent=4 -> compact",
+            lambda: [json.dumps(obj, indent=4).encode() for _, obj in payloads],
+            lambda: [json_codec.dumps_bytes(obj) for _, obj in payloads],
+            repeats)
+    measure("encode pretty",
+            lambda: [json.dumps(obj, indent=json_codec.PRETTY_INDENT).encode() for _, obj in payloads],
+            lambda: [json_codec.dumps_bytes(obj, pretty=True) for _, obj in payloads],
+            repeats)
+
+    pretty_size = sum(len(json.dumps(obj, indent=4)) for _, obj in payloads)
+    compact_size = sum(len(json_codec.dumps_bytes(obj)) for _, obj in payloads)
+    print(f"output size: {pretty_size / 1024:.0f} KiB with indent=4, "
+          f"{compact_size / 1024:.0f} KiB compact")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Measures what a champion select session update costs in app/session_manager.py.
+
+The captured sessions in JSONfiles/ are replayed as a stream of websocket updates, every
+capture repeated a few times like the timer updates the client sends each second. The current
+models (__slots__, patched in place) are compared with the previous ones, which were plain
+objects with a __dict__ re-created for every action and team member on every update.
+
+Run from the repository root or from this directory:
+
+    python utillity/session_benchmark.py [repeats]
+"""
+
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from packages import json_codec  # noqa: E402
+from session_manager import SessionManager  # noqa: E402
+
+# how many times each capture is sent, most updates only move the timer
+UPDATES_PER_CAPTURE = 5
+
+
+class DictAction:
+    """Action as it used to be: a plain object with a __dict__."""
+
+    def __init__(self):
+        self.actor_cell_id = None
+        self.champion_id = None
+        self.completed = None
+        self.id = None
+        self.is_ally_action = None
+        self.is_in_progress = None
+        self.type = None
+
+    def update(self, action):
+        self.actor_cell_id = action["actorCellId"]
+        self.champion_id = action["championId"]
+        self.completed = action["completed"]
+        self.id = action["id"]
+        self.is_ally_action = action["isAllyAction"]
+        self.is_in_progress = action["isInProgress"]
+        self.type = action["type"]
+
+
+class DictTeamMember:
+    """TeamMember as it used to be: a plain object with a __dict__."""
+
+    def __init__(self):
+        self.assigned_position = None
+        self.cell_id = None
+        self.champion_id = None
+        self.champion_pick_intent = None
+        self.entitled_feature_type = None
+        self.selected_skin_id = None
+        self.spell1_id = None
+        self.spell2_id = None
+        self.summoner_id = None
+        self.team = None
+        self.ward_skin_id = None
+
+    def update(self, member):
+        self.assigned_position = member["assignedPosition"]
+        self.cell_id = member["cellId"]
+        self.champion_id = member["championId"]
+        self.champion_pick_intent = member["championPickIntent"]
+        self.entitled_feature_type = member["entitledFeatureType"]
+        self.selected_skin_id = member["selectedSkinId"]
+        self.spell1_id = member["spell1Id"]
+        self.spell2_id = member["spell2Id"]
+        self.summoner_id = member["summonerId"]
+        self.team = member["team"]
+        self.ward_skin_id = member["wardSkinId"]
+
+
+class RebuildingSession:
+    """The previous sync: clear everything and create new objects for every entry."""
+
+    def __init__(self, summoner_id):
+        self.summoner_id = summoner_id
+        self.my_team = []
+        self.their_team = []
+        self.actions = []
+        self.me = None
+        self.my_action = None
+
+    def sync_with_websocket(self, session):
+        self.my_team = []
+        for data in session["myTeam"]:
+            member = DictTeamMember()
+            member.update(data)
+            self.my_team.append(member)
+            if member.summoner_id == self.summoner_id:
+                self.me = member
+
+        self.their_team = []
+        for data in session["theirTeam"]:
+            member = DictTeamMember()
+            member.update(data)
+            self.their_team.append(member)
+
+        self.actions = []
+        self.actions_in_progress = []
+        self.ban_actions = []
+        self.pick_actions = []
+        self.my_action = None
+        for turn in session["actions"]:
+            for data in turn:
+                action = DictAction()
+                action.update(data)
+                self.actions.append(action)
+                if action.is_in_progress:
+                    self.actions_in_progress.append(action)
+                    if self.me and action.actor_cell_id == self.me.cell_id:
+                        self.my_action = action
+                if action.completed:
+                    if action.type == "ban":
+                        self.ban_actions.append(action)
+                    elif action.type == "pick":
+                        self.pick_actions.append(action)
+
+    def objects(self):
+        return [*self.my_team, *self.their_team, *self.actions]
+
+
+class PatchingSession(SessionManager):
+    """The current SessionManager with the same objects() helper."""
+
+    def objects(self):
+        return [*self.my_team, *self.their_team, *self.actions]
+
+
+def load_updates():
+    updates = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "JSONfiles", "**", "*.json"), recursive=True)):
+        try:
+            data = json_codec.load_file(path)
+        except json_codec.JSONDecodeError:
+            continue
+        if not (isinstance(data, dict) and "myTeam" in data and "actions" in data):
+            continue
+
+        # like the websocket, every update is a freshly decoded payload
+        raw = json_codec.dumps_bytes(data)
+        for second in range(UPDATES_PER_CAPTURE):
+            update = json_codec.loads(raw)
+            if "timer" in update:
+                update["timer"]["adjustedTimeLeftInPhase"] -= second * 1000
+            updates.append(update)
+    return updates
+
+
+def object_size(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def replay(session, updates):
+    """Returns new model objects and bytes allocated (traced peak) per update."""
+    created = 0
+    peak = 0
+    for update in updates:
+        # the old objects are kept alive, so new ones can't reuse their ids
+        old_objects = session.objects()
+        before = {id(obj) for obj in old_objects}
+
+        tracemalloc.start()
+        session.sync_with_websocket(update)
+        peak += tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        created += sum(id(obj) not in before for obj in session.objects())
+    return created / len(updates), peak / len(updates)
+
+
+def timings(make_session, updates, repeats):
+    """Returns the best time (in seconds) of the timer only updates and of the updates which
+    bring a new capture, summed over the stream."""
+    best_timer, best_new = float("inf"), float("inf")
+    for _ in range(repeats):
+        session = make_session()
+        timer_only, new = 0.0, 0.0
+        for index, update in enumerate(updates):
+            start = time.perf_counter()
+            session.sync_with_websocket(update)
+            elapsed = time.perf_counter() - start
+            if index % UPDATES_PER_CAPTURE:
+                timer_only += elapsed
+            else:
+                new += elapsed
+        best_timer, best_new = min(best_timer, timer_only), min(best_new, new)
+    return best_timer, best_new
+
+
+def measure(label, make_session, updates, repeats):
+    created, peak = replay(make_session(), updates)
+    timer_only, new = timings(make_session, updates, repeats)
+
+    session = make_session()
+    session.sync_with_websocket(updates[-1])
+    objects = session.objects()
+    model_size = sum(object_size(obj) for obj in objects)
+
+    captures = len(updates) // UPDATES_PER_CAPTURE
+    print(f"{label:<12}{created:>12.1f}{peak / 1024:>12.1f} KiB{model_size / len(objects):>12.0f} B"
+          f"{timer_only / (len(updates) - captures) * 1e6:>12.1f} us"
+          f"{new / captures * 1e6:>12.1f} us")
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    updates = load_updates()
+    summoner_id = updates[0]["myTeam"][0]["summonerId"]
+
+    print(f"updates: {len(updates)} ({len(updates) // UPDATES_PER_CAPTURE} captures)")
+    print("per update: new model objects, allocated memory (traced peak), size of a model")
+    print("object, time of a timer only update and of an update with a new capture")
+    print(f"{'':<12}{'new objects':>12}{'allocated':>16}{'per object':>14}"
+          f"{'timer only':>15}{'new capture':>15}")
+
+    measure("rebuilding", lambda: RebuildingSession(summoner_id), updates, repeats)
+
+    def patching():
+        session = PatchingSession()
+        session.set_summoner_id(summoner_id)
+        return session
+
+    measure("patching", patching, updates, repeats)
+
+
+if __name__ == "__main__":
+    main()